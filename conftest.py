@@ -0,0 +1,26 @@
+"""
+Shared pytest fixtures for the pipeline test scripts
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.utils.data_loader import load_all_data
+
+
+@pytest.fixture(scope="session")
+def source_data():
+    """
+    Parsed source data, loaded once per test session
+
+    Tests must treat the DataFrames as read-only.
+
+    Returns:
+        Tuple of (customers_df, orders_df, order_items_df)
+    """
+    return load_all_data()
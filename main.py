@@ -5,8 +5,11 @@ Runs both table-based and in-memory approaches and compares results.
 
 import os
 import sys
+import argparse
 import logging
 from datetime import datetime
+from functools import partial
+import numpy as np
 import pandas as pd
 
 # Add src to path
@@ -14,7 +17,8 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
 from src.config import RESULTS_DIR
 from src.utils.logger import setup_logger
-from src.utils.data_loader import load_customers_csv, load_orders_xml
+from src.utils.data_loader import load_all_data
+from src.utils.parallel import run_parallel
 
 # Table-based imports
 from src.table_based.db_connection import get_db_engine
@@ -39,11 +43,43 @@ from src.in_memory.kpi_calculator import (
 # Initialize logger
 logger = setup_logger('main')
 
+# KPI result keys and their display names (shared by comparison and report sheets)
+KPI_MAPPING = {
+    'repeat_customers': 'Repeat Customers',
+    'monthly_trends': 'Monthly Trends',
+    'regional_revenue': 'Regional Revenue',
+    'top_customers_30d': 'Top Customers 30D'
+}
 
-def run_table_based_approach():
+
+def export_kpis_to_parquet(kpis, prefix):
+    """
+    Write each KPI DataFrame to its own Parquet file (primary results artifact).
+    
+    Args:
+        kpis (dict): Dictionary of KPI DataFrames
+        prefix (str): File name prefix identifying the approach
+    
+    Returns:
+        dict: Dictionary mapping KPI name to the written Parquet file path
+    """
+    parquet_files = {}
+    for kpi_name, df in kpis.items():
+        parquet_file = os.path.join(RESULTS_DIR, f'{prefix}_{kpi_name}.parquet')
+        df.to_parquet(parquet_file, compression='zstd', index=False)
+        parquet_files[kpi_name] = parquet_file
+    
+    logger.info(f"Exported {len(parquet_files)} KPI Parquet files with prefix '{prefix}'")
+    return parquet_files
+
+
+def run_table_based_approach(use_cache=True):
     """
     Execute table-based approach using MySQL database.
     
+    Args:
+        use_cache (bool): Reuse the on-disk cache of parsed input data
+    
     Returns:
         dict: Dictionary containing KPI DataFrames
     """
@@ -54,8 +90,7 @@ def run_table_based_approach():
     try:
         # Load data
         logger.info("Loading data from CSV and XML files...")
-        customers_df = load_customers_csv()
-        orders_df, order_items_df = load_orders_xml()
+        customers_df, orders_df, order_items_df = load_all_data(use_cache=use_cache)
         logger.info(f"Loaded {len(customers_df)} customers, {len(orders_df)} orders, {len(order_items_df)} order items")
         
         # Setup database
@@ -70,31 +105,22 @@ def run_table_based_approach():
         ingest_orders(orders_df, order_items_df)
         logger.info("Data ingestion completed successfully")
         
-        # Calculate KPIs
+        # Calculate KPIs (independent queries, each on its own pooled connection)
         logger.info("Calculating KPIs using SQL queries...")
-        kpis = {}
+        kpis = run_parallel({
+            'repeat_customers': get_repeat_customers,
+            'monthly_trends': get_monthly_order_trends,
+            'regional_revenue': get_regional_revenue,
+            'top_customers_30d': get_top_customers_last_30_days
+        })
         
-        kpis['repeat_customers'] = get_repeat_customers()
         logger.info(f"Repeat Customers: {len(kpis['repeat_customers'])} customers found")
-        
-        kpis['monthly_trends'] = get_monthly_order_trends()
         logger.info(f"Monthly Trends: {len(kpis['monthly_trends'])} months analyzed")
-        
-        kpis['regional_revenue'] = get_regional_revenue()
         logger.info(f"Regional Revenue: {len(kpis['regional_revenue'])} regions analyzed")
-        
-        kpis['top_customers_30d'] = get_top_customers_last_30_days()
         logger.info(f"Top Customers (30d): {len(kpis['top_customers_30d'])} customers listed")
         
-        # Export to Excel
-        output_file = os.path.join(RESULTS_DIR, 'table_based_kpis.xlsx')
-        logger.info(f"Exporting results to {output_file}...")
-        
-        with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
-            kpis['repeat_customers'].to_excel(writer, sheet_name='Repeat Customers', index=False)
-            kpis['monthly_trends'].to_excel(writer, sheet_name='Monthly Trends', index=False)
-            kpis['regional_revenue'].to_excel(writer, sheet_name='Regional Revenue', index=False)
-            kpis['top_customers_30d'].to_excel(writer, sheet_name='Top Customers 30D', index=False)
+        # Export to Parquet (primary artifact); Excel sheets go into the pipeline report
+        export_kpis_to_parquet(kpis, 'table_based')
         
         logger.info("Table-based approach completed successfully")
         logger.info("=" * 80)
@@ -106,10 +132,13 @@ def run_table_based_approach():
         raise
 
 
-def run_in_memory_approach():
+def run_in_memory_approach(use_cache=True):
     """
     Execute in-memory approach using Pandas DataFrames.
     
+    Args:
+        use_cache (bool): Reuse the on-disk cache of parsed input data
+    
     Returns:
         dict: Dictionary containing KPI DataFrames
     """
@@ -121,48 +150,45 @@ def run_in_memory_approach():
         # Initialize processor and load data
         logger.info("Initializing data processor and loading data...")
         processor = DataProcessor()
-        processor.load_data()
+        processor.load_data(use_cache=use_cache)
         logger.info(f"Loaded {len(processor.customers_df)} customers, {len(processor.orders_df)} orders, {len(processor.order_items_df)} order items")
         
-        # Calculate KPIs
+        # Join orders with customers once for the regional KPI
+        merged_df = processor.get_orders_with_customers()
+        
+        # Calculate KPIs (independent, read-only over the shared DataFrames)
         logger.info("Calculating KPIs using Pandas operations...")
-        kpis = {}
+        kpis = run_parallel({
+            'repeat_customers': partial(
+                calculate_repeat_customers,
+                processor.customers_df,
+                processor.orders_df
+            ),
+            'monthly_trends': partial(
+                calculate_monthly_trends,
+                processor.orders_df,
+                processor.order_items_df
+            ),
+            'regional_revenue': partial(
+                calculate_regional_revenue,
+                processor.customers_df,
+                processor.orders_df,
+                merged_df=merged_df
+            ),
+            'top_customers_30d': partial(
+                calculate_top_customers_last_30_days,
+                processor.customers_df,
+                processor.orders_df
+            )
+        })
         
-        kpis['repeat_customers'] = calculate_repeat_customers(
-            processor.customers_df, 
-            processor.orders_df
-        )
         logger.info(f"Repeat Customers: {len(kpis['repeat_customers'])} customers found")
-        
-        kpis['monthly_trends'] = calculate_monthly_trends(
-            processor.orders_df, 
-            processor.order_items_df
-        )
         logger.info(f"Monthly Trends: {len(kpis['monthly_trends'])} months analyzed")
-        
-        kpis['regional_revenue'] = calculate_regional_revenue(
-            processor.customers_df, 
-            processor.orders_df
-        )
         logger.info(f"Regional Revenue: {len(kpis['regional_revenue'])} regions analyzed")
-        
-        kpis['top_customers_30d'] = calculate_top_customers_last_30_days(
-            processor.customers_df, 
-            processor.orders_df
-        )
         logger.info(f"Top Customers (30d): {len(kpis['top_customers_30d'])} customers listed")
         
-        # Export to Excel
-        output_file = os.path.join(RESULTS_DIR, 'in_memory_kpis.xlsx')
-        logger.info(f"Exporting results to {output_file}...")
-        
-        with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
-            # Convert timezone-aware columns to naive for Excel
-            for kpi_name, df in kpis.items():
-                df_copy = df.copy()
-                for col in df_copy.select_dtypes(include=['datetime64[ns, Asia/Kolkata]']).columns:
-                    df_copy[col] = df_copy[col].dt.tz_localize(None)
-                df_copy.to_excel(writer, sheet_name=kpi_name.replace('_', ' ').title()[:31], index=False)
+        # Export to Parquet (primary artifact); Excel sheets go into the pipeline report
+        export_kpis_to_parquet(kpis, 'in_memory')
         
         logger.info("In-memory approach completed successfully")
         logger.info("=" * 80)
@@ -186,47 +212,23 @@ def compare_results(table_kpis, memory_kpis):
     logger.info("COMPARING RESULTS FROM BOTH APPROACHES")
     logger.info("=" * 80)
     
-    comparison_summary = []
-    
-    kpi_mapping = {
-        'repeat_customers': 'Repeat Customers',
-        'monthly_trends': 'Monthly Trends',
-        'regional_revenue': 'Regional Revenue',
-        'top_customers_30d': 'Top Customers 30D'
-    }
-    
-    all_match = True
+    # Compare row counts
+    summary_df = pd.DataFrame({
+        'KPI': list(KPI_MAPPING.values()),
+        'Table-Based Rows': [len(table_kpis[key]) for key in KPI_MAPPING],
+        'In-Memory Rows': [len(memory_kpis[key]) for key in KPI_MAPPING]
+    })
+    matches = summary_df['Table-Based Rows'] == summary_df['In-Memory Rows']
+    summary_df['Status'] = np.where(matches, 'MATCH', 'MISMATCH')
+    all_match = bool(matches.all())
     
-    for key, name in kpi_mapping.items():
-        table_df = table_kpis[key]
-        memory_df = memory_kpis[key]
-        
-        # Compare row counts
-        table_count = len(table_df)
-        memory_count = len(memory_df)
-        
-        if table_count == memory_count:
-            status = "MATCH"
+    for name, table_count, memory_count, match in zip(
+        summary_df['KPI'], summary_df['Table-Based Rows'], summary_df['In-Memory Rows'], matches
+    ):
+        if match:
             logger.info(f"{name}: {table_count} rows (Both approaches agree)")
         else:
-            status = "MISMATCH"
-            all_match = False
             logger.warning(f"{name}: Table={table_count} rows, Memory={memory_count} rows (MISMATCH)")
-        
-        comparison_summary.append({
-            'KPI': name,
-            'Table-Based Rows': table_count,
-            'In-Memory Rows': memory_count,
-            'Status': status
-        })
-    
-    # Create comparison summary DataFrame
-    summary_df = pd.DataFrame(comparison_summary)
-    
-    # Save comparison to file
-    comparison_file = os.path.join(RESULTS_DIR, 'comparison_summary.xlsx')
-    summary_df.to_excel(comparison_file, index=False)
-    logger.info(f"Comparison summary saved to {comparison_file}")
     
     logger.info("=" * 80)
     if all_match:
@@ -238,10 +240,42 @@ def compare_results(table_kpis, memory_kpis):
     return summary_df
 
 
+def export_pipeline_report(table_kpis, memory_kpis, comparison_df):
+    """
+    Write both approaches' KPIs and the comparison summary into one Excel workbook.
+    
+    Args:
+        table_kpis (dict): KPIs from table-based approach
+        memory_kpis (dict): KPIs from in-memory approach
+        comparison_df (pd.DataFrame): Comparison summary from compare_results
+    
+    Returns:
+        str: Path to the written workbook
+    """
+    output_file = os.path.join(RESULTS_DIR, 'pipeline_report.xlsx')
+    logger.info(f"Exporting pipeline report to {output_file}...")
+    
+    with pd.ExcelWriter(output_file, engine='xlsxwriter', datetime_format='yyyy-mm-dd hh:mm:ss') as writer:
+        for prefix, kpis in (('Table', table_kpis), ('In-Memory', memory_kpis)):
+            for key, name in KPI_MAPPING.items():
+                kpis[key].to_excel(writer, sheet_name=f'{prefix} {name}', index=False)
+        comparison_df.to_excel(writer, sheet_name='Comparison', index=False)
+    
+    return output_file
+
+
 def main():
     """
     Main function to orchestrate the complete pipeline.
     """
+    parser = argparse.ArgumentParser(description="Akasa Air data engineering pipeline")
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help="Re-parse the CSV/XML inputs instead of using the cached DataFrames"
+    )
+    args = parser.parse_args()
+    
     logger.info("=" * 80)
     logger.info("AKASA AIR DATA ENGINEERING PIPELINE")
     logger.info(f"Execution started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
@@ -252,14 +286,17 @@ def main():
         os.makedirs(RESULTS_DIR, exist_ok=True)
         
         # Run table-based approach
-        table_kpis = run_table_based_approach()
+        table_kpis = run_table_based_approach(use_cache=not args.no_cache)
         
         # Run in-memory approach
-        memory_kpis = run_in_memory_approach()
+        memory_kpis = run_in_memory_approach(use_cache=not args.no_cache)
         
         # Compare results
         comparison_df = compare_results(table_kpis, memory_kpis)
         
+        # Export all Excel sheets into a single workbook
+        report_file = export_pipeline_report(table_kpis, memory_kpis, comparison_df)
+        
         logger.info("=" * 80)
         logger.info("PIPELINE EXECUTION COMPLETED SUCCESSFULLY")
         logger.info(f"Execution finished at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
@@ -269,9 +306,8 @@ def main():
         print("PIPELINE EXECUTION SUMMARY")
         print("=" * 80)
         print("\nResults exported to:")
-        print(f"  - Table-based: {os.path.join(RESULTS_DIR, 'table_based_kpis.xlsx')}")
-        print(f"  - In-memory: {os.path.join(RESULTS_DIR, 'in_memory_kpis.xlsx')}")
-        print(f"  - Comparison: {os.path.join(RESULTS_DIR, 'comparison_summary.xlsx')}")
+        print(f"  - Parquet: {os.path.join(RESULTS_DIR, '*.parquet')}")
+        print(f"  - Excel report: {report_file}")
         print("\nComparison Summary:")
         print(comparison_df.to_string(index=False))
         print("=" * 80 + "\n")
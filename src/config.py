@@ -23,6 +23,10 @@ DB_CONFIG = {
     'database': os.getenv('DB_NAME')
 }
 
+# Connection pool sizing (ingestion and parallel KPI queries share the pool)
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 20))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 40))
+
 # Validate required environment variables
 required_vars = ['DB_HOST', 'DB_USER', 'DB_PASSWORD', 'DB_NAME']
 missing_vars = [var for var in required_vars if os.getenv(var) is None]
@@ -36,6 +40,22 @@ if missing_vars:
 LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
 TIMEZONE = pytz.timezone(os.getenv('TIMEZONE', 'Asia/Kolkata'))
 
+# Ingestion Settings
+# When enabled, ingestion uses MySQL LOAD DATA LOCAL INFILE instead of INSERT statements
+# (requires local_infile=ON on the MySQL server)
+BULK_LOAD = os.getenv('BULK_LOAD', 'false').lower() in ('1', 'true', 'yes')
+# When enabled, every pooled connection skips unique/foreign key checks and uses a larger
+# bulk insert buffer (only for trusted, already-validated input)
+DB_BULK_MODE = os.getenv('DB_BULK_MODE', 'false').lower() in ('1', 'true', 'yes')
+
+# Query Settings
+# When enabled (and connectorx is installed), parameterless KPI queries are read with
+# connectorx; its column dtypes can differ from pandas.read_sql, so it is opt-in
+USE_CONNECTORX = os.getenv('USE_CONNECTORX', 'false').lower() in ('1', 'true', 'yes')
+# When enabled, KPI query results are memoized in-process until this process ingests
+# new data; only safe when this process is the database's single writer
+KPI_CACHE = os.getenv('KPI_CACHE', 'false').lower() in ('1', 'true', 'yes')
+
 # Data File Paths
 CUSTOMERS_CSV_PATH = BASE_DIR / os.getenv('CUSTOMERS_CSV_PATH', 'data/task_DE_new_customers.csv')
 ORDERS_XML_PATH = BASE_DIR / os.getenv('ORDERS_XML_PATH', 'data/task_DE_new_orders.xml')
@@ -43,6 +63,7 @@ ORDERS_XML_PATH = BASE_DIR / os.getenv('ORDERS_XML_PATH', 'data/task_DE_new_orde
 # Directories
 LOGS_DIR = BASE_DIR / 'logs'
 RESULTS_DIR = BASE_DIR / os.getenv('RESULTS_DIR', 'results')
+CACHE_DIR = RESULTS_DIR / '.cache'  # Cached parsed input data (created on first use)
 
 # Ensure directories exist
 LOGS_DIR.mkdir(exist_ok=True)
@@ -4,6 +4,7 @@ In-memory (Pandas) processing modules
 
 from .data_processor import DataProcessor
 from .kpi_calculator import (
+    build_orders_customers,
     calculate_repeat_customers,
     calculate_monthly_trends,
     calculate_regional_revenue,
@@ -12,6 +13,7 @@ from .kpi_calculator import (
 
 __all__ = [
     'DataProcessor',
+    'build_orders_customers',
     'calculate_repeat_customers',
     'calculate_monthly_trends',
     'calculate_regional_revenue',
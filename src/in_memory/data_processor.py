@@ -6,7 +6,9 @@ Handles in-memory data processing using pandas DataFrames
 import pandas as pd
 from typing import Tuple
 
+from src.config import TIMEZONE
 from src.utils.data_loader import load_all_data
+from src.in_memory.kpi_calculator import build_orders_customers
 from src.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
@@ -22,12 +24,17 @@ class DataProcessor:
         self.customers_df = None
         self.orders_df = None
         self.order_items_df = None
+        self.orders_customers_df = None
+        self.tz = TIMEZONE
         self._loaded = False
     
-    def load_data(self) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    def load_data(self, use_cache: bool = True) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
         """
         Load data from CSV/XML files into DataFrames
         
+        Args:
+            use_cache: Reuse cleaned DataFrames cached on disk for unchanged source files
+        
         Returns:
             Tuple of (customers_df, orders_df, order_items_df)
         """
@@ -35,10 +42,33 @@ class DataProcessor:
             logger.info("Loading data into DataFrames...")
             
             # Reuse existing data loaders (already handles cleaning, validation, timezone)
-            self.customers_df, self.orders_df, self.order_items_df = load_all_data()
+            self.customers_df, self.orders_df, self.order_items_df = load_all_data(use_cache=use_cache)
+            self.orders_customers_df = None
+            
+            # Store order timestamps as naive IST wall-clock times (timezone kept in self.tz)
+            # so KPI frames can be written to Excel without per-column conversion
+            self.orders_df['order_date_time'] = (
+                self.orders_df['order_date_time'].dt.tz_convert(self.tz).dt.tz_localize(None)
+            )
+            
+            # Keep orders sorted by date so date-window filters can binary search
+            self.orders_df = self.orders_df.sort_values('order_date_time', ignore_index=True)
+            
+            # Encode string group/join keys as categoricals for faster groupby and merge
+            self._encode_categoricals()
+            
+            # Narrow numeric columns to halve the bytes streamed by aggregations
+            self._downcast_numerics()
             
             self._loaded = True
             
+            logger.debug(
+                f"Column dtypes: "
+                f"customers={self.customers_df.dtypes.astype(str).to_dict()}, "
+                f"orders={self.orders_df.dtypes.astype(str).to_dict()}, "
+                f"order_items={self.order_items_df.dtypes.astype(str).to_dict()}"
+            )
+            
             logger.info(
                 f"Data loaded successfully: "
                 f"{len(self.customers_df)} customers, "
@@ -52,6 +82,39 @@ class DataProcessor:
             logger.error(f"Failed to load data: {str(e)}")
             raise
     
+    def _encode_categoricals(self):
+        """
+        Convert region, mobile_number and sku_id columns to categorical dtype
+        
+        mobile_number shares one category set across customers and orders so
+        joins on it stay categorical (and orders from unknown customers keep
+        their value instead of becoming NaN).
+        """
+        self.customers_df['region'] = self.customers_df['region'].astype('category')
+        
+        mobile_dtype = pd.CategoricalDtype(
+            pd.Index(self.customers_df['mobile_number'].unique()).union(
+                self.orders_df['mobile_number'].unique()
+            )
+        )
+        self.customers_df['mobile_number'] = self.customers_df['mobile_number'].astype(mobile_dtype)
+        self.orders_df['mobile_number'] = self.orders_df['mobile_number'].astype(mobile_dtype)
+        
+        self.order_items_df['sku_id'] = self.order_items_df['sku_id'].astype('category')
+    
+    def _downcast_numerics(self):
+        """
+        Downcast numeric columns where no precision is lost
+        
+        sku_count is narrowed to the smallest integer type. total_amount stays
+        float64: sums of whole amounts could be exact in float32, but means
+        (avg_order_value) would not be, and KPI columns must stay float64.
+        """
+        self.order_items_df['sku_count'] = pd.to_numeric(
+            self.order_items_df['sku_count'],
+            downcast='integer'
+        )
+    
     def get_data(self) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
         """
         Get loaded DataFrames (load if not already loaded)
@@ -64,6 +127,24 @@ class DataProcessor:
         
         return self.customers_df, self.orders_df, self.order_items_df
     
+    def get_orders_with_customers(self) -> pd.DataFrame:
+        """
+        Get orders joined with customer attributes (computed once and cached)
+        
+        Returns:
+            DataFrame with one row per order and its customer attributes
+        """
+        if not self._loaded:
+            self.load_data()
+        
+        if self.orders_customers_df is None:
+            self.orders_customers_df = build_orders_customers(
+                self.orders_df,
+                self.customers_df
+            )
+        
+        return self.orders_customers_df
+    
     def get_data_summary(self) -> dict:
         """
         Get summary statistics of loaded data
@@ -77,7 +158,7 @@ class DataProcessor:
         summary = {
             'customers': {
                 'count': len(self.customers_df),
-                'regions': self.customers_df['region'].unique().tolist(),
+                'regions': self.customers_df['region'].cat.categories.tolist(),
                 'columns': self.customers_df.columns.tolist()
             },
             'orders': {
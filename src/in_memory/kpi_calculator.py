@@ -3,15 +3,169 @@ KPI Calculator Module
 Modular functions to calculate KPIs using pandas DataFrames
 """
 
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 
 from src.config import TIMEZONE, LAST_N_DAYS
 from src.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# Customer attributes reported alongside customer-level KPIs
+CUSTOMER_COLUMNS = ['customer_id', 'customer_name', 'mobile_number', 'region']
+
+# Columns carried by the shared orders x customers join
+ORDERS_CUSTOMERS_COLUMNS = CUSTOMER_COLUMNS + ['order_id', 'order_date_time', 'total_amount']
+
+
+def build_orders_customers(
+    orders_df: pd.DataFrame,
+    customers_df: pd.DataFrame
+) -> pd.DataFrame:
+    """
+    Join orders with their customers once so KPIs can share the result
+    
+    Args:
+        orders_df: DataFrame with order data
+        customers_df: DataFrame with customer data
+        
+    Returns:
+        DataFrame with one row per (order, customer) match and the customer's
+        attributes; orders on a mobile number shared by several customers repeat
+    """
+    # Index-aligned join on mobile_number instead of a per-call hash merge
+    customers_by_mobile = customers_df.set_index('mobile_number')[
+        ['customer_id', 'customer_name', 'region']
+    ]
+    
+    merged_df = orders_df.join(customers_by_mobile, on='mobile_number', how='inner')
+    
+    return merged_df[ORDERS_CUSTOMERS_COLUMNS]
+
+
+def _attach_customers(
+    order_stats: pd.DataFrame,
+    customers_df: pd.DataFrame
+) -> pd.DataFrame:
+    """
+    Attach customer attributes to order aggregates keyed by mobile_number
+    
+    Aggregating orders per mobile number first and joining afterwards keeps
+    the join at one row per customer instead of one row per order.
+    
+    Args:
+        order_stats: DataFrame of order aggregates indexed by mobile_number
+        customers_df: DataFrame with customer data
+        
+    Returns:
+        DataFrame with customer columns followed by the aggregate columns
+    """
+    return customers_df[CUSTOMER_COLUMNS].join(order_stats, on='mobile_number', how='inner')
+
+
+def _as_object_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Cast the customer attribute columns of a KPI result back to object dtype
+    
+    The loaded frames use Arrow-backed strings and categoricals internally;
+    KPI results keep the plain object columns consumers (exports, comparisons
+    with the table-based results) have always seen.
+    
+    Args:
+        df: KPI result DataFrame
+        
+    Returns:
+        DataFrame with its customer attribute columns as object dtype
+    """
+    columns = [col for col in CUSTOMER_COLUMNS if col in df.columns]
+    return df.astype({col: object for col in columns})
+
+
+def _per_customer_stats(
+    orders: pd.DataFrame,
+    customers_df: pd.DataFrame
+) -> pd.DataFrame:
+    """
+    Per-customer order aggregates shared by the customer-level KPIs
+    
+    Orders are aggregated before the customer join, so customers sharing a
+    mobile number each get that number's full order totals exactly once.
+    
+    Args:
+        orders: DataFrame with one row per order (not joined with customers)
+        customers_df: DataFrame with customer data
+        
+    Returns:
+        DataFrame with customer columns plus order_count, total_spent,
+        last_order_date and first_order_date
+    """
+    # One grouped pass per mobile number (one row per order_id, so count == nunique)
+    order_stats = orders.groupby('mobile_number', observed=True, sort=False).agg(
+        order_count=('order_id', 'count'),
+        total_spent=('total_amount', 'sum'),
+        last_order_date=('order_date_time', 'max'),
+        first_order_date=('order_date_time', 'min')
+    )
+    
+    return _attach_customers(order_stats, customers_df)
+
+
+def _region_agg(
+    codes: np.ndarray,
+    amounts: np.ndarray,
+    n_groups: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Grouped sum, max and count of order amounts over integer group codes
+    
+    Args:
+        codes: Group code (0..n_groups-1) for each order
+        amounts: Order amount for each order
+        n_groups: Number of distinct groups
+        
+    Returns:
+        Tuple of (totals, maxima, counts) arrays indexed by group code
+    """
+    totals = np.bincount(codes, weights=amounts, minlength=n_groups)
+    counts = np.bincount(codes, minlength=n_groups)
+    
+    # Lay amounts out contiguously per group and reduce each run in one call
+    # (np.maximum.at is unbuffered and far slower per element)
+    sorted_amounts = amounts[np.argsort(codes, kind='stable')]
+    starts = np.cumsum(counts) - counts
+    present = counts > 0
+    maxima = np.full(n_groups, -np.inf)
+    if present.any():
+        maxima[present] = np.maximum.reduceat(sorted_amounts, starts[present])
+    
+    return totals, maxima, counts
+
+
+def _distinct_per_group(
+    codes: np.ndarray,
+    values: pd.Series,
+    n_groups: int
+) -> np.ndarray:
+    """
+    Count distinct values per group over integer group codes
+    
+    Args:
+        codes: Group code (0..n_groups-1) for each row
+        values: Value for each row (same length as codes)
+        n_groups: Number of distinct groups
+        
+    Returns:
+        Array of distinct value counts indexed by group code
+    """
+    # Unique (group, value) code pairs, then one count per group
+    value_codes, uniques = pd.factorize(values)
+    n_values = max(len(uniques), 1)
+    pairs = np.unique(codes * n_values + value_codes)
+    
+    return np.bincount(pairs // n_values, minlength=n_groups)
+
 
 def calculate_repeat_customers(
     customers_df: pd.DataFrame,
@@ -30,33 +184,23 @@ def calculate_repeat_customers(
     try:
         logger.info("Calculating repeat customers...")
         
-        # Merge customers with orders
-        merged_df = orders_df.merge(
-            customers_df,
-            on='mobile_number',
-            how='inner'
-        )
-        
-        # Group by customer and count distinct orders
-        repeat_customers = merged_df.groupby(
-            ['customer_id', 'customer_name', 'mobile_number', 'region']
-        ).agg(
-            order_count=('order_id', 'nunique'),
-            total_spent=('total_amount', 'sum')
-        ).reset_index()
-        
         # Filter customers with more than 1 order
-        repeat_customers = repeat_customers[repeat_customers['order_count'] > 1]
+        stats = _per_customer_stats(orders_df, customers_df)
+        repeat_customers = stats.loc[
+            stats['order_count'] > 1,
+            CUSTOMER_COLUMNS + ['order_count', 'total_spent']
+        ]
         
         # Sort by order count and total spent
         repeat_customers = repeat_customers.sort_values(
             by=['order_count', 'total_spent'],
-            ascending=False
-        ).reset_index(drop=True)
+            ascending=False,
+            ignore_index=True
+        )
         
         logger.info(f"Found {len(repeat_customers)} repeat customers")
         
-        return repeat_customers
+        return _as_object_columns(repeat_customers)
         
     except Exception as e:
         logger.error(f"Failed to calculate repeat customers: {str(e)}")
@@ -80,28 +224,40 @@ def calculate_monthly_trends(
     try:
         logger.info("Calculating monthly order trends...")
         
-        # Create month column
-        orders_with_month = orders_df.copy()
-        orders_with_month['month'] = orders_with_month['order_date_time'].dt.to_period('M').astype(str)
-        
-        # Merge with order items to get item counts
-        merged_df = orders_with_month.merge(
-            order_items_df,
-            on='order_id',
-            how='left'
+        # Integer month key (year * 12 + month - 1); formatted as YYYY-MM only at the end
+        order_dates = orders_df['order_date_time'].dt
+        month = pd.Series(
+            order_dates.year.to_numpy(np.int32) * 12 + order_dates.month.to_numpy(np.int32) - 1,
+            index=orders_df.index,
+            name='month'
         )
         
-        # Group by month
-        monthly_trends = merged_df.groupby('month').agg(
-            order_count=('order_id', 'nunique'),
-            total_items=('sku_id', 'count'),
+        # Collapse order items to a per-order count, aligned to orders (one row per order)
+        items_per_order = order_items_df.groupby('order_id', sort=False).size()
+        item_counts = orders_df['order_id'].map(items_per_order).fillna(0).astype('int64')
+        
+        # Group by month (keys are sorted explicitly below)
+        monthly_trends = orders_df.groupby(month, sort=False).agg(
+            order_count=('order_id', 'count'),
             total_revenue=('total_amount', 'sum'),
-            avg_order_value=('total_amount', 'mean'),
-            unique_customers=('mobile_number', 'nunique')
-        ).reset_index()
+            avg_order_value=('total_amount', 'mean')
+        )
+        monthly_trends.insert(1, 'total_items', item_counts.groupby(month, sort=False).sum())
+        
+        # Count distinct customers with a single dedup over (month, customer) pairs
+        monthly_trends['unique_customers'] = (
+            pd.DataFrame({'month': month, 'mobile_number': orders_df['mobile_number']})
+            .drop_duplicates()
+            .groupby('month', sort=False)
+            .size()
+        )
         
-        # Sort by month descending
-        monthly_trends = monthly_trends.sort_values(by='month', ascending=False).reset_index(drop=True)
+        # Sort by month descending, then render the month keys for display
+        monthly_trends = monthly_trends.sort_index(ascending=False).reset_index()
+        monthly_trends['month'] = [
+            f"{month_key // 12:04d}-{month_key % 12 + 1:02d}"
+            for month_key in monthly_trends['month']
+        ]
         
         logger.info(f"Retrieved {len(monthly_trends)} months of order trends")
         
@@ -114,7 +270,8 @@ def calculate_monthly_trends(
 
 def calculate_regional_revenue(
     customers_df: pd.DataFrame,
-    orders_df: pd.DataFrame
+    orders_df: pd.DataFrame,
+    merged_df: Optional[pd.DataFrame] = None
 ) -> pd.DataFrame:
     """
     KPI 3: Sum of total_amount grouped by region
@@ -122,6 +279,7 @@ def calculate_regional_revenue(
     Args:
         customers_df: DataFrame with customer data
         orders_df: DataFrame with order data
+        merged_df: Optional precomputed orders x customers join
         
     Returns:
         DataFrame with regional revenue breakdown
@@ -129,37 +287,75 @@ def calculate_regional_revenue(
     try:
         logger.info("Calculating regional revenue...")
         
-        # Merge customers with orders
-        merged_df = orders_df.merge(
-            customers_df[['mobile_number', 'customer_id', 'region']],
-            on='mobile_number',
-            how='inner'
+        # Merge customers with orders (unless already provided)
+        if merged_df is None:
+            merged_df = build_orders_customers(orders_df, customers_df)
+        
+        # Encode regions as integer codes (free for categoricals) and drop missing regions
+        region_codes, regions = pd.factorize(merged_df['region'])
+        has_region = region_codes >= 0
+        region_codes = region_codes[has_region]
+        amounts = merged_df['total_amount'].to_numpy(np.float64)[has_region]
+        n_regions = len(regions)
+        
+        # Group by region with array reductions instead of generic groupby
+        totals, maxima, row_counts = _region_agg(region_codes, amounts, n_regions)
+        
+        # Distinct customers and orders per region (a mobile number shared by several
+        # customers repeats its orders in the join, so row counts would overcount)
+        customer_counts = _distinct_per_group(
+            region_codes, merged_df['customer_id'][has_region], n_regions
+        )
+        order_counts = _distinct_per_group(
+            region_codes, merged_df['order_id'][has_region], n_regions
         )
         
-        # Group by region
-        regional_revenue = merged_df.groupby('region').agg(
-            customer_count=('customer_id', 'nunique'),
-            order_count=('order_id', 'nunique'),
-            total_revenue=('total_amount', 'sum'),
-            avg_order_value=('total_amount', 'mean'),
-            max_order_value=('total_amount', 'max')
-        ).reset_index()
+        regional_revenue = pd.DataFrame({
+            'region': regions,
+            'customer_count': customer_counts,
+            'order_count': order_counts,
+            'total_revenue': totals,
+            'avg_order_value': totals / row_counts,
+            'max_order_value': maxima
+        })
         
         # Sort by total revenue descending
         regional_revenue = regional_revenue.sort_values(
             by='total_revenue',
-            ascending=False
-        ).reset_index(drop=True)
+            ascending=False,
+            ignore_index=True
+        )
         
         logger.info(f"Retrieved revenue data for {len(regional_revenue)} regions")
         
-        return regional_revenue
+        return _as_object_columns(regional_revenue)
         
     except Exception as e:
         logger.error(f"Failed to calculate regional revenue: {str(e)}")
         raise
 
 
+def _align_cutoff(cutoff_date: datetime, order_dates: pd.Series) -> datetime:
+    """
+    Match the cutoff's timezone handling to the order timestamps
+    
+    DataProcessor stores order times as naive IST wall-clock values, so an
+    aware cutoff is converted to IST and made naive (and vice versa).
+    
+    Args:
+        cutoff_date: Cutoff datetime (naive or timezone-aware)
+        order_dates: Series of order timestamps
+        
+    Returns:
+        Cutoff datetime comparable with order_dates
+    """
+    if order_dates.dt.tz is None and cutoff_date.tzinfo is not None:
+        return cutoff_date.astimezone(TIMEZONE).replace(tzinfo=None)
+    if order_dates.dt.tz is not None and cutoff_date.tzinfo is None:
+        return TIMEZONE.localize(cutoff_date)
+    return cutoff_date
+
+
 def calculate_top_customers_last_30_days(
     customers_df: pd.DataFrame,
     orders_df: pd.DataFrame,
@@ -187,37 +383,30 @@ def calculate_top_customers_last_30_days(
             cutoff_date = current_time - timedelta(days=LAST_N_DAYS)
         
         # Filter orders from last 30 days
-        recent_orders = orders_df[orders_df['order_date_time'] >= cutoff_date].copy()
-        
-        # Merge with customers
-        merged_df = recent_orders.merge(
-            customers_df,
-            on='mobile_number',
-            how='inner'
-        )
+        order_dates = orders_df['order_date_time']
+        cutoff_date = _align_cutoff(cutoff_date, order_dates)
+        if order_dates.is_monotonic_increasing:
+            # Date-sorted input: locate the cutoff by binary search and slice
+            recent_orders = orders_df.iloc[order_dates.searchsorted(cutoff_date):]
+        else:
+            recent_orders = orders_df[order_dates >= cutoff_date]
         
-        # Group by customer
-        top_customers = merged_df.groupby(
-            ['customer_id', 'customer_name', 'mobile_number', 'region']
-        ).agg(
-            order_count=('order_id', 'nunique'),
-            total_spent=('total_amount', 'sum'),
-            last_order_date=('order_date_time', 'max'),
-            first_order_date=('order_date_time', 'min')
-        ).reset_index()
+        # Aggregate per customer over the date window
+        top_customers = _per_customer_stats(recent_orders, customers_df)
         
         # Sort by total spent and take top N
         top_customers = top_customers.sort_values(
             by='total_spent',
-            ascending=False
-        ).head(top_n).reset_index(drop=True)
+            ascending=False,
+            ignore_index=True
+        ).head(top_n)
         
         logger.info(
             f"Retrieved top {len(top_customers)} customers for last {LAST_N_DAYS} days "
             f"(from {cutoff_date.strftime('%Y-%m-%d')} onwards)"
         )
         
-        return top_customers
+        return _as_object_columns(top_customers)
         
     except Exception as e:
         logger.error(f"Failed to calculate top customers: {str(e)}")
@@ -243,11 +432,18 @@ def calculate_all_kpis(
     try:
         logger.info("Calculating all KPIs using in-memory approach...")
         
+        # Join orders with customers once (reused by the regional KPI)
+        merged_df = build_orders_customers(orders_df, customers_df)
+        
         kpis = {
             'repeat_customers': calculate_repeat_customers(customers_df, orders_df),
             'monthly_trends': calculate_monthly_trends(orders_df, order_items_df),
-            'regional_revenue': calculate_regional_revenue(customers_df, orders_df),
-            'top_customers_last_30_days': calculate_top_customers_last_30_days(customers_df, orders_df)
+            'regional_revenue': calculate_regional_revenue(
+                customers_df, orders_df, merged_df=merged_df
+            ),
+            'top_customers_last_30_days': calculate_top_customers_last_30_days(
+                customers_df, orders_df
+            )
         }
         
         logger.info("All KPIs calculated successfully")
@@ -267,26 +463,22 @@ def export_kpis_to_excel(kpis: dict, output_file: str):
         output_file: Path to output Excel file
     """
     try:
-        # Convert timezone-aware datetimes to timezone-naive for Excel compatibility
-        kpis_copy = {}
-        for key, df in kpis.items():
-            df_copy = df.copy()
-            # Convert datetime columns to timezone-naive
-            for col in df_copy.select_dtypes(include=['datetime64[ns, Asia/Kolkata]']).columns:
-                df_copy[col] = df_copy[col].dt.tz_localize(None)
-            kpis_copy[key] = df_copy
-        
-        with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
-            kpis_copy['repeat_customers'].to_excel(
+        # Order timestamps are already naive IST (see DataProcessor.load_data)
+        with pd.ExcelWriter(
+            output_file,
+            engine='xlsxwriter',
+            datetime_format='yyyy-mm-dd hh:mm:ss'
+        ) as writer:
+            kpis['repeat_customers'].to_excel(
                 writer, sheet_name='Repeat Customers', index=False
             )
-            kpis_copy['monthly_trends'].to_excel(
+            kpis['monthly_trends'].to_excel(
                 writer, sheet_name='Monthly Trends', index=False
             )
-            kpis_copy['regional_revenue'].to_excel(
+            kpis['regional_revenue'].to_excel(
                 writer, sheet_name='Regional Revenue', index=False
             )
-            kpis_copy['top_customers_last_30_days'].to_excel(
+            kpis['top_customers_last_30_days'].to_excel(
                 writer, sheet_name='Top Customers 30D', index=False
             )
         
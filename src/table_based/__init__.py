@@ -4,12 +4,18 @@ Table-based (MySQL) processing modules
 
 from .db_connection import get_db_engine, get_db_session
 from .db_setup import create_tables, drop_tables
-from .data_ingestion import ingest_customers, ingest_orders
+from .data_ingestion import (
+    ingest_customers,
+    ingest_orders,
+    bulk_ingest_customers,
+    bulk_ingest_orders
+)
 from .kpi_queries import (
     get_repeat_customers,
     get_monthly_order_trends,
     get_regional_revenue,
-    get_top_customers_last_30_days
+    get_top_customers_last_30_days,
+    clear_kpi_cache
 )
 
 __all__ = [
@@ -19,8 +25,11 @@ __all__ = [
     'drop_tables',
     'ingest_customers',
     'ingest_orders',
+    'bulk_ingest_customers',
+    'bulk_ingest_orders',
     'get_repeat_customers',
     'get_monthly_order_trends',
     'get_regional_revenue',
-    'get_top_customers_last_30_days'
+    'get_top_customers_last_30_days',
+    'clear_kpi_cache'
 ]
@@ -3,51 +3,336 @@ Data Ingestion Module
 Loads data from CSV/XML into MySQL database using parameterized queries
 """
 
-from sqlalchemy.dialects.mysql import insert
 from sqlalchemy import text
+from itertools import islice
+from typing import Iterable, Iterator, List
+import os
+import tempfile
 import pandas as pd
 
+from src.config import BULK_LOAD, TIMEZONE
 from src.utils.data_loader import load_all_data
-from src.table_based.db_setup import Customer, Order, OrderItem
 from src.table_based.db_connection import get_db_engine
+from src.table_based.kpi_queries import clear_kpi_cache
 from src.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+CUSTOMER_COLUMNS = ['customer_id', 'customer_name', 'mobile_number', 'region']
+ORDER_COLUMNS = ['order_id', 'mobile_number', 'order_date_time', 'total_amount']
+ORDER_ITEM_COLUMNS = ['order_id', 'sku_id', 'sku_count']
+
+# Columns overwritten when an upserted key already exists
+CUSTOMER_UPDATE_COLUMNS = ['customer_name', 'region']
+ORDER_UPDATE_COLUMNS = ['order_date_time', 'total_amount']
+
+# Rows per multi-row INSERT statement (keeps statements well below max_allowed_packet)
+INSERT_CHUNK_SIZE = 1000
+
+# LOAD DATA warnings logged individually before the load is failed
+MAX_LOGGED_LOAD_WARNINGS = 10
+
+
+def _chunks(records: Iterable, size: int = INSERT_CHUNK_SIZE) -> Iterator[list]:
+    """
+    Split records into consecutive chunks of at most size rows
+    
+    Args:
+        records: Rows (tuples or values) to split; consumed lazily
+        size: Maximum rows per chunk
+        
+    Yields:
+        Lists of rows
+    """
+    iterator = iter(records)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _insert_sql(table_name: str, columns: List[str], update_columns: List[str] = None) -> str:
+    """
+    Build a DBAPI INSERT template, optionally with ON DUPLICATE KEY UPDATE
+    
+    Args:
+        table_name: Target table (internal name, never user input)
+        columns: Columns to insert, in parameter order
+        update_columns: Columns to overwrite when the key already exists
+        
+    Returns:
+        SQL string with %s placeholders for PyMySQL
+    """
+    sql = (
+        f"INSERT INTO {table_name} ({', '.join(columns)}) "
+        f"VALUES ({', '.join(['%s'] * len(columns))})"
+    )
+    
+    # Update on duplicate key
+    if update_columns:
+        sql += " ON DUPLICATE KEY UPDATE " + ', '.join(
+            f"{col} = VALUES({col})" for col in update_columns
+        )
+    
+    return sql
+
+
+# Statement templates built once per module load
+CUSTOMER_UPSERT_SQL = _insert_sql('customers', CUSTOMER_COLUMNS, CUSTOMER_UPDATE_COLUMNS)
+ORDER_UPSERT_SQL = _insert_sql('orders', ORDER_COLUMNS, ORDER_UPDATE_COLUMNS)
+ORDER_ITEM_INSERT_SQL = _insert_sql('order_items', ORDER_ITEM_COLUMNS)
+
+
+def _executemany(conn, sql: str, df: pd.DataFrame, columns: List[str]) -> int:
+    """
+    Insert DataFrame rows through the raw PyMySQL cursor
+    
+    Bypasses SQLAlchemy's per-statement parameter processing. PyMySQL's
+    executemany rewrites each chunk into a multi-row VALUES statement.
+    
+    Args:
+        conn: SQLAlchemy connection inside an open transaction
+        sql: INSERT template with %s placeholders (see _insert_sql)
+        df: DataFrame to insert
+        columns: Columns to insert, in placeholder order
+        
+    Returns:
+        Number of rows processed
+    """
+    # DATETIME columns are naive: send timezone-aware values as IST wall-clock time
+    # (the same representation the LOAD DATA path writes)
+    frame = df[columns]
+    tz_columns = frame.select_dtypes(include=['datetimetz']).columns
+    frame = frame.assign(**{
+        col: frame[col].dt.tz_convert(TIMEZONE).dt.tz_localize(None) for col in tz_columns
+    })
+    
+    # Stream plain tuples chunk by chunk instead of materializing every row up front
+    cursor = conn.connection.cursor()
+    try:
+        for chunk in _chunks(frame.itertuples(index=False, name=None)):
+            cursor.executemany(sql, chunk)
+    finally:
+        cursor.close()
+    
+    return len(frame)
+
+
+def _bulk_load_via_infile(df: pd.DataFrame, table_name: str, conn, columns: List[str]) -> int:
+    """
+    Load DataFrame columns into a table using LOAD DATA LOCAL INFILE
+    
+    The DataFrame is spilled to a temporary CSV file which MySQL streams
+    straight into the storage engine, bypassing per-row INSERT parsing.
+    MySQL downgrades bad values (truncated strings, unparseable dates) to
+    warnings during LOAD DATA, so any warning fails the load instead.
+    
+    Args:
+        df: DataFrame to load
+        table_name: Target table (internal name, never user input)
+        conn: SQLAlchemy connection inside an open transaction
+        columns: Columns to load, in file order
+        
+    Returns:
+        Number of rows loaded by the server
+        
+    Raises:
+        ValueError: If the server reported warnings for the load
+    """
+    with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False, newline='') as tmp:
+        df.to_csv(
+            tmp,
+            columns=columns,
+            header=False,
+            index=False,
+            na_rep='NULL',
+            date_format='%Y-%m-%d %H:%M:%S',
+            lineterminator='\n'
+        )
+        file_path = tmp.name
+    
+    try:
+        result = conn.execute(
+            text(
+                f"LOAD DATA LOCAL INFILE :file_path INTO TABLE {table_name} "
+                f"FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' ESCAPED BY '' "
+                f"LINES TERMINATED BY '\\n' ({', '.join(columns)})"
+            ),
+            {"file_path": file_path}
+        )
+        rows_loaded = result.rowcount
+        warnings = conn.execute(text("SHOW WARNINGS")).fetchall()
+    finally:
+        os.remove(file_path)
+    
+    if warnings:
+        for level, code, message in warnings[:MAX_LOGGED_LOAD_WARNINGS]:
+            logger.error(f"LOAD DATA into {table_name}: {level} {code}: {message}")
+        raise ValueError(
+            f"LOAD DATA into {table_name} produced {len(warnings)} warnings "
+            f"({rows_loaded} of {len(df)} rows loaded)"
+        )
+    
+    return rows_loaded
+
+
+def _bulk_upsert_via_infile(
+    df: pd.DataFrame,
+    table_name: str,
+    conn,
+    columns: List[str],
+    update_columns: List[str]
+) -> int:
+    """
+    Upsert a DataFrame by bulk loading it into a staging table first
+    
+    Args:
+        df: DataFrame to upsert
+        table_name: Target table (internal name, never user input)
+        conn: SQLAlchemy connection inside an open transaction
+        columns: Columns to load, in file order
+        update_columns: Columns to overwrite when the key already exists
+        
+    Returns:
+        Number of rows loaded into the staging table
+    """
+    staging_table = f"_staging_{table_name}"
+    column_list = ', '.join(columns)
+    updates = ', '.join(
+        f"{table_name}.{col} = {staging_table}.{col}" for col in update_columns
+    )
+    
+    conn.execute(text(f"CREATE TEMPORARY TABLE {staging_table} LIKE {table_name}"))
+    try:
+        rows = _bulk_load_via_infile(df, staging_table, conn, columns)
+        conn.execute(text(
+            f"INSERT INTO {table_name} ({column_list}) "
+            f"SELECT {column_list} FROM {staging_table} "
+            f"ON DUPLICATE KEY UPDATE {updates}"
+        ))
+    finally:
+        conn.execute(text(f"DROP TEMPORARY TABLE IF EXISTS {staging_table}"))
+    
+    return rows
+
+
+def _delete_order_items(conn, order_ids: List[str]):
+    """
+    Delete existing order items for the given orders (for clean re-ingestion)
+    
+    Args:
+        conn: SQLAlchemy connection inside an open transaction
+        order_ids: Order IDs whose items should be removed
+    """
+    # Delete in bounded IN-lists so large ingests stay below max_allowed_packet
+    for chunk in _chunks(order_ids):
+        # Using parameterized query for security
+        conn.execute(
+            text("DELETE FROM order_items WHERE order_id IN :order_ids"),
+            {"order_ids": tuple(chunk)}
+        )
+
+
+def bulk_ingest_customers(customers_df: pd.DataFrame) -> int:
+    """
+    Ingest customer data using LOAD DATA LOCAL INFILE into a staging table
+    
+    Args:
+        customers_df: DataFrame with customer data
+        
+    Returns:
+        Number of records inserted/updated
+    """
+    try:
+        engine = get_db_engine()
+        
+        with engine.begin() as conn:
+            records_processed = _bulk_upsert_via_infile(
+                customers_df,
+                'customers',
+                conn,
+                CUSTOMER_COLUMNS,
+                update_columns=CUSTOMER_UPDATE_COLUMNS
+            )
+        
+        clear_kpi_cache()
+        logger.info(f"Bulk loaded {records_processed} customer records")
+        return records_processed
+        
+    except Exception as e:
+        logger.error(f"Failed to bulk load customers: {str(e)}")
+        raise
+
+
+def bulk_ingest_orders(orders_df: pd.DataFrame, order_items_df: pd.DataFrame) -> tuple:
+    """
+    Ingest orders and order items using LOAD DATA LOCAL INFILE
+    
+    Args:
+        orders_df: DataFrame with order data
+        order_items_df: DataFrame with order items data
+        
+    Returns:
+        Tuple of (orders_count, items_count)
+    """
+    try:
+        engine = get_db_engine()
+        
+        with engine.begin() as conn:
+            orders_processed = _bulk_upsert_via_infile(
+                orders_df,
+                'orders',
+                conn,
+                ORDER_COLUMNS,
+                update_columns=ORDER_UPDATE_COLUMNS
+            )
+            
+            _delete_order_items(conn, orders_df['order_id'].tolist())
+            items_processed = _bulk_load_via_infile(
+                order_items_df,
+                'order_items',
+                conn,
+                ORDER_ITEM_COLUMNS
+            )
+        
+        clear_kpi_cache()
+        logger.info(f"Bulk loaded {orders_processed} orders and {items_processed} order items")
+        return orders_processed, items_processed
+        
+    except Exception as e:
+        logger.error(f"Failed to bulk load orders: {str(e)}")
+        raise
+
 
 def ingest_customers(customers_df: pd.DataFrame) -> int:
     """
     Ingest customer data into database using parameterized queries
     
+    Uses the LOAD DATA bulk path instead when BULK_LOAD is enabled.
+    
     Args:
         customers_df: DataFrame with customer data
         
     Returns:
         Number of records inserted/updated
     """
+    if BULK_LOAD:
+        return bulk_ingest_customers(customers_df)
+    
     try:
         engine = get_db_engine()
-        records_processed = 0
         
         with engine.begin() as conn:
-            for _, row in customers_df.iterrows():
-                # Using INSERT ... ON DUPLICATE KEY UPDATE for upsert
-                stmt = insert(Customer).values(
-                    customer_id=row['customer_id'],
-                    customer_name=row['customer_name'],
-                    mobile_number=row['mobile_number'],
-                    region=row['region']
-                )
-                
-                # Update on duplicate key
-                stmt = stmt.on_duplicate_key_update(
-                    customer_name=stmt.inserted.customer_name,
-                    region=stmt.inserted.region
-                )
-                
-                conn.execute(stmt)
-                records_processed += 1
+            # Using multi-row INSERT ... ON DUPLICATE KEY UPDATE for upsert
+            records_processed = _executemany(
+                conn,
+                CUSTOMER_UPSERT_SQL,
+                customers_df,
+                CUSTOMER_COLUMNS
+            )
         
+        clear_kpi_cache()
         logger.info(f"Ingested {records_processed} customer records")
         return records_processed
         
@@ -60,6 +345,8 @@ def ingest_orders(orders_df: pd.DataFrame, order_items_df: pd.DataFrame) -> tupl
     """
     Ingest orders and order items into database using parameterized queries
     
+    Uses the LOAD DATA bulk path instead when BULK_LOAD is enabled.
+    
     Args:
         orders_df: DataFrame with order data
         order_items_df: DataFrame with order items data
@@ -67,50 +354,33 @@ def ingest_orders(orders_df: pd.DataFrame, order_items_df: pd.DataFrame) -> tupl
     Returns:
         Tuple of (orders_count, items_count)
     """
+    if BULK_LOAD:
+        return bulk_ingest_orders(orders_df, order_items_df)
+    
     try:
         engine = get_db_engine()
-        orders_processed = 0
-        items_processed = 0
         
         with engine.begin() as conn:
             # Ingest orders
-            for _, row in orders_df.iterrows():
-                stmt = insert(Order).values(
-                    order_id=row['order_id'],
-                    mobile_number=row['mobile_number'],
-                    order_date_time=row['order_date_time'],
-                    total_amount=row['total_amount']
-                )
-                
-                # Update on duplicate key
-                stmt = stmt.on_duplicate_key_update(
-                    order_date_time=stmt.inserted.order_date_time,
-                    total_amount=stmt.inserted.total_amount
-                )
-                
-                conn.execute(stmt)
-                orders_processed += 1
+            orders_processed = _executemany(
+                conn,
+                ORDER_UPSERT_SQL,
+                orders_df,
+                ORDER_COLUMNS
+            )
             
             # Delete existing order items for these orders (for clean re-ingestion)
-            order_ids = orders_df['order_id'].tolist()
-            if order_ids:
-                # Using parameterized query for security
-                conn.execute(
-                    text("DELETE FROM order_items WHERE order_id IN :order_ids"),
-                    {"order_ids": tuple(order_ids)}
-                )
+            _delete_order_items(conn, orders_df['order_id'].tolist())
             
-            # Ingest order items
-            for _, row in order_items_df.iterrows():
-                stmt = insert(OrderItem).values(
-                    order_id=row['order_id'],
-                    sku_id=row['sku_id'],
-                    sku_count=row['sku_count']
-                )
-                
-                conn.execute(stmt)
-                items_processed += 1
+            # Ingest order items (executemany; PyMySQL batches these into multi-row VALUES)
+            items_processed = _executemany(
+                conn,
+                ORDER_ITEM_INSERT_SQL,
+                order_items_df,
+                ORDER_ITEM_COLUMNS
+            )
         
+        clear_kpi_cache()
         logger.info(f"Ingested {orders_processed} orders and {items_processed} order items")
         return orders_processed, items_processed
         
@@ -119,10 +389,13 @@ def ingest_orders(orders_df: pd.DataFrame, order_items_df: pd.DataFrame) -> tupl
         raise
 
 
-def ingest_all_data() -> dict:
+def ingest_all_data(use_cache: bool = True) -> dict:
     """
     Load and ingest all data from CSV/XML files
     
+    Args:
+        use_cache: Reuse DataFrames cached on disk for unchanged source files
+    
     Returns:
         Dictionary with ingestion statistics
     """
@@ -130,7 +403,7 @@ def ingest_all_data() -> dict:
         logger.info("Starting data ingestion process...")
         
         # Load data from files
-        customers_df, orders_df, order_items_df = load_all_data()
+        customers_df, orders_df, order_items_df = load_all_data(use_cache=use_cache)
         
         # Ingest customers
         customers_count = ingest_customers(customers_df)
@@ -166,6 +439,7 @@ def clear_all_data():
             conn.execute(text("DELETE FROM orders"))
             conn.execute(text("DELETE FROM customers"))
         
+        clear_kpi_cache()
         logger.info("All data cleared from database")
         
     except Exception as e:
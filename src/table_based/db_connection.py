@@ -7,17 +7,43 @@ from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import QueuePool
 from typing import Generator
+import threading
 import pymysql
 
-from src.config import get_database_url, DB_CONFIG
+from src.config import get_database_url, DB_CONFIG, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_BULK_MODE, BULK_LOAD
 from src.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
 # Global engine instance
 _engine = None
+_engine_lock = threading.Lock()
 _SessionLocal = None
 
+# Session settings applied to each new connection when DB_BULK_MODE is enabled
+# (innodb_flush_log_at_trx_commit is global-only, so it is left to the server config)
+BULK_MODE_SESSION_SETTINGS = (
+    "SET SESSION unique_checks = 0",
+    "SET SESSION foreign_key_checks = 0",
+    "SET SESSION bulk_insert_buffer_size = 268435456",
+)
+
+
+def _apply_bulk_session_settings(dbapi_connection, connection_record):
+    """
+    Relax per-row integrity checks on a new DBAPI connection for bulk writes
+    
+    Args:
+        dbapi_connection: Raw PyMySQL connection
+        connection_record: Pool connection record (unused)
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        for statement in BULK_MODE_SESSION_SETTINGS:
+            cursor.execute(statement)
+    finally:
+        cursor.close()
+
 
 def get_db_engine():
     """
@@ -28,25 +54,37 @@ def get_db_engine():
     """
     global _engine
     
-    if _engine is None:
-        try:
-            database_url = get_database_url()
-            
-            # Create engine with connection pooling
-            _engine = create_engine(
-                database_url,
-                poolclass=QueuePool,
-                pool_size=5,
-                max_overflow=10,
-                pool_pre_ping=True,  # Verify connections before using
-                echo=False  # Set to True for SQL query logging
-            )
-            
-            logger.info(f"Database engine created for {DB_CONFIG['database']}")
-            
-        except Exception as e:
-            logger.error(f"Failed to create database engine: {str(e)}")
-            raise
+    # Fast path: engine already created (no lock needed)
+    if _engine is not None:
+        return _engine
+    
+    # Parallel KPI queries may race on first use; create the engine only once
+    with _engine_lock:
+        if _engine is None:
+            try:
+                database_url = get_database_url()
+                
+                # Create engine with connection pooling
+                _engine = create_engine(
+                    database_url,
+                    poolclass=QueuePool,
+                    pool_size=DB_POOL_SIZE,
+                    max_overflow=DB_MAX_OVERFLOW,
+                    pool_pre_ping=True,  # Verify connections before using
+                    echo=False,  # Set to True for SQL query logging
+                    # Allow LOAD DATA LOCAL INFILE only when the bulk load path is enabled
+                    connect_args={'local_infile': True} if BULK_LOAD else {}
+                )
+                
+                if DB_BULK_MODE:
+                    event.listen(_engine, 'connect', _apply_bulk_session_settings)
+                    logger.info("Bulk mode enabled: unique and foreign key checks disabled per session")
+                
+                logger.info(f"Database engine created for {DB_CONFIG['database']}")
+                
+            except Exception as e:
+                logger.error(f"Failed to create database engine: {str(e)}")
+                raise
     
     return _engine
 
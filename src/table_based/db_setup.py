@@ -3,7 +3,7 @@ Database Schema Definition
 Defines SQLAlchemy ORM models for customers, orders, and order_items tables
 """
 
-from sqlalchemy import Column, String, Float, Integer, DateTime, ForeignKey, Index
+from sqlalchemy import Column, String, Float, Integer, DateTime, ForeignKey, Index, inspect, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -16,6 +16,12 @@ logger = setup_logger(__name__)
 # Base class for all models
 Base = declarative_base()
 
+# Indexes made redundant by later covering indexes, dropped from existing tables
+# (both were single-column order_date_time indexes, a prefix of idx_orders_date_mobile_amount)
+OBSOLETE_INDEXES = {
+    'orders': ['idx_order_date', 'ix_orders_order_date_time'],
+}
+
 
 class Customer(Base):
     """
@@ -31,6 +37,11 @@ class Customer(Base):
     # Relationship to orders
     orders = relationship("Order", back_populates="customer", cascade="all, delete-orphan")
     
+    # Covering index for the regional revenue KPI (group by region, join on mobile_number)
+    __table_args__ = (
+        Index('idx_cust_region_mobile', 'region', 'mobile_number'),
+    )
+    
     def __repr__(self):
         return f"<Customer(id={self.customer_id}, name={self.customer_name})>"
 
@@ -43,16 +54,18 @@ class Order(Base):
     
     order_id = Column(String(50), primary_key=True, nullable=False)
     mobile_number = Column(String(15), ForeignKey('customers.mobile_number'), nullable=False)
-    order_date_time = Column(DateTime, nullable=False, index=True)
+    order_date_time = Column(DateTime, nullable=False)
     total_amount = Column(Float, nullable=False)
     
     # Relationships
     customer = relationship("Customer", back_populates="orders")
     order_items = relationship("OrderItem", back_populates="order", cascade="all, delete-orphan")
     
-    # Index for date-based queries (for last 30 days KPI)
+    # Covering indexes so the KPI joins/aggregations are answered from the index
+    # without row lookups (the date-leading one also serves last 30 days range scans)
     __table_args__ = (
-        Index('idx_order_date', 'order_date_time'),
+        Index('idx_orders_mobile_amount_date', 'mobile_number', 'total_amount', 'order_date_time'),
+        Index('idx_orders_date_mobile_amount', 'order_date_time', 'mobile_number', 'total_amount'),
     )
     
     def __repr__(self):
@@ -82,6 +95,24 @@ class OrderItem(Base):
         return f"<OrderItem(order={self.order_id}, sku={self.sku_id}, count={self.sku_count})>"
 
 
+def _drop_obsolete_indexes(engine):
+    """
+    Drop indexes listed in OBSOLETE_INDEXES that still exist on the tables
+    
+    Args:
+        engine: SQLAlchemy engine
+    """
+    inspector = inspect(engine)
+    
+    with engine.begin() as conn:
+        for table, index_names in OBSOLETE_INDEXES.items():
+            existing = {index['name'] for index in inspector.get_indexes(table)}
+            for index_name in index_names:
+                if index_name in existing:
+                    conn.execute(text(f"DROP INDEX `{index_name}` ON `{table}`"))
+                    logger.info(f"Dropped redundant index {index_name} on {table}")
+
+
 def create_tables(drop_existing=False):
     """
     Create all database tables
@@ -106,6 +137,13 @@ def create_tables(drop_existing=False):
         Base.metadata.create_all(engine)
         logger.info("Database tables created successfully")
         
+        # create_all skips existing tables, so add indexes introduced since they were created
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(engine, checkfirst=True)
+        
+        _drop_obsolete_indexes(engine)
+        
         # Log table information
         tables = Base.metadata.tables.keys()
         logger.info(f"Tables in database: {list(tables)}")
@@ -131,32 +169,38 @@ def drop_tables():
         raise
 
 
-def get_table_info():
+def get_table_info(exact: bool = False):
     """
     Get information about existing tables
     
+    Row counts come from information_schema.TABLES.TABLE_ROWS in a single
+    query; for InnoDB these are estimates.
+    
+    Args:
+        exact: Count rows with SELECT COUNT(*) per table instead (full index scans)
+    
     Returns:
         dict: Table information
     """
     try:
         engine = get_db_engine()
-        from sqlalchemy import text
         
         with engine.connect() as conn:
-            # Get table names
+            # Get table names with their estimated row counts
             tables_result = conn.execute(
-                text(f"SELECT TABLE_NAME FROM information_schema.TABLES "
-                     f"WHERE TABLE_SCHEMA = :db_name"),
+                text("SELECT TABLE_NAME, TABLE_ROWS FROM information_schema.TABLES "
+                     "WHERE TABLE_SCHEMA = :db_name"),
                 {"db_name": engine.url.database}
             )
-            tables = [row[0] for row in tables_result]
+            table_info = {
+                table: {'row_count': int(row_count or 0)}
+                for table, row_count in tables_result
+            }
             
-            # Get row counts
-            table_info = {}
-            for table in tables:
-                count_result = conn.execute(text(f"SELECT COUNT(*) FROM {table}"))
-                count = count_result.fetchone()[0]
-                table_info[table] = {'row_count': count}
+            if exact:
+                for table in table_info:
+                    count_result = conn.execute(text(f"SELECT COUNT(*) FROM `{table}`"))
+                    table_info[table]['row_count'] = count_result.scalar()
             
             return table_info
             
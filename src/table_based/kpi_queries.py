@@ -3,17 +3,109 @@ KPI Queries Module
 SQL queries to calculate business KPIs using database tables
 """
 
-from sqlalchemy import text
+from sqlalchemy import text, bindparam, DateTime, Integer
 from datetime import datetime, timedelta
+import functools
+import threading
 import pandas as pd
 
 from src.table_based.db_connection import get_db_engine
-from src.config import TIMEZONE, LAST_N_DAYS
+from src.config import TIMEZONE, LAST_N_DAYS, USE_CONNECTORX, KPI_CACHE, get_database_url
 from src.utils.logger import setup_logger
+from src.utils.parallel import run_parallel
 
 logger = setup_logger(__name__)
 
+# Optional: connectorx fetches results straight into Arrow buffers (no per-row tuples)
+cx = None
+if USE_CONNECTORX:
+    try:
+        import connectorx as cx
+    except ImportError:
+        logger.warning("USE_CONNECTORX is set but connectorx is not installed; using pandas.read_sql")
+
+# In-process KPI results keyed by (query function, arguments, cache version)
+_kpi_cache = {}
+_kpi_cache_version = 0
+_kpi_cache_lock = threading.Lock()
+
+
+def _cached_kpi(func):
+    """
+    Memoize a KPI query function until the cache is cleared (opt-in via KPI_CACHE)
+    
+    Results are reused while the cache version (bumped by clear_kpi_cache)
+    and the call arguments are unchanged; callers receive a copy of the
+    cached frame. Only writes made through this process's ingestion
+    functions invalidate the cache, so it is only safe when this process is
+    the database's single writer; with KPI_CACHE off every call queries.
+    
+    Args:
+        func: KPI function returning a DataFrame
+        
+    Returns:
+        Wrapped function
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not KPI_CACHE:
+            return func(*args, **kwargs)
+        
+        with _kpi_cache_lock:
+            version = _kpi_cache_version
+            key = (func.__name__, args, tuple(sorted(kwargs.items())), version)
+            cached = _kpi_cache.get(key)
+        
+        if cached is not None:
+            logger.info(f"Using cached result for {func.__name__}")
+            return cached.copy()
+        
+        df = func(*args, **kwargs)
+        
+        with _kpi_cache_lock:
+            # Skip storing a result computed before a concurrent clear
+            if version == _kpi_cache_version:
+                _kpi_cache[key] = df
+        
+        return df.copy()
+    
+    return wrapper
+
+
+def clear_kpi_cache():
+    """
+    Drop all cached KPI results and bump the cache version (called after data ingestion)
+    """
+    global _kpi_cache_version
+    
+    with _kpi_cache_lock:
+        _kpi_cache_version += 1
+        _kpi_cache.clear()
+
+
+def _read_query(query, params: dict = None) -> pd.DataFrame:
+    """
+    Run a KPI query and return the result as a DataFrame
+    
+    Parameterless queries go through connectorx when USE_CONNECTORX is set
+    and it is installed; otherwise (or when bind parameters are needed)
+    pandas reads through the SQLAlchemy engine.
+    
+    Args:
+        query: SQLAlchemy text query
+        params: Optional bind parameters
+        
+    Returns:
+        DataFrame with the query result
+    """
+    if cx is not None and not params:
+        connectorx_url = get_database_url().replace('mysql+pymysql://', 'mysql://', 1)
+        return cx.read_sql(connectorx_url, str(query), return_type='pandas')
+    
+    return pd.read_sql(query, get_db_engine(), params=params)
+
 
+@_cached_kpi
 def get_repeat_customers() -> pd.DataFrame:
     """
     KPI 1: Identify customers with more than one order
@@ -22,8 +114,6 @@ def get_repeat_customers() -> pd.DataFrame:
         DataFrame with repeat customer information
     """
     try:
-        engine = get_db_engine()
-        
         query = text("""
             SELECT 
                 c.customer_id,
@@ -39,7 +129,7 @@ def get_repeat_customers() -> pd.DataFrame:
             ORDER BY order_count DESC, total_spent DESC
         """)
         
-        df = pd.read_sql(query, engine)
+        df = _read_query(query)
         logger.info(f"Found {len(df)} repeat customers")
         
         return df
@@ -49,6 +139,7 @@ def get_repeat_customers() -> pd.DataFrame:
         raise
 
 
+@_cached_kpi
 def get_monthly_order_trends() -> pd.DataFrame:
     """
     KPI 2: Aggregate orders by month to observe trends
@@ -57,23 +148,25 @@ def get_monthly_order_trends() -> pd.DataFrame:
         DataFrame with monthly order trends
     """
     try:
-        engine = get_db_engine()
-        
         query = text("""
             SELECT 
                 DATE_FORMAT(o.order_date_time, '%Y-%m') as month,
-                COUNT(DISTINCT o.order_id) as order_count,
-                COUNT(oi.id) as total_items,
+                COUNT(o.order_id) as order_count,
+                COALESCE(SUM(oi.item_count), 0) as total_items,
                 SUM(o.total_amount) as total_revenue,
                 AVG(o.total_amount) as avg_order_value,
                 COUNT(DISTINCT o.mobile_number) as unique_customers
             FROM orders o
-            LEFT JOIN order_items oi ON o.order_id = oi.order_id
+            LEFT JOIN (
+                SELECT order_id, COUNT(*) as item_count
+                FROM order_items
+                GROUP BY order_id
+            ) oi ON o.order_id = oi.order_id
             GROUP BY DATE_FORMAT(o.order_date_time, '%Y-%m')
             ORDER BY month DESC
         """)
         
-        df = pd.read_sql(query, engine)
+        df = _read_query(query)
         logger.info(f"Retrieved {len(df)} months of order trends")
         
         return df
@@ -83,6 +176,7 @@ def get_monthly_order_trends() -> pd.DataFrame:
         raise
 
 
+@_cached_kpi
 def get_regional_revenue() -> pd.DataFrame:
     """
     KPI 3: Sum of total_amount grouped by region
@@ -91,8 +185,6 @@ def get_regional_revenue() -> pd.DataFrame:
         DataFrame with regional revenue breakdown
     """
     try:
-        engine = get_db_engine()
-        
         query = text("""
             SELECT 
                 c.region,
@@ -107,7 +199,7 @@ def get_regional_revenue() -> pd.DataFrame:
             ORDER BY total_revenue DESC
         """)
         
-        df = pd.read_sql(query, engine)
+        df = _read_query(query)
         logger.info(f"Retrieved revenue data for {len(df)} regions")
         
         return df
@@ -128,11 +220,10 @@ def get_top_customers_last_30_days(top_n: int = 10) -> pd.DataFrame:
         DataFrame with top customers by spend
     """
     try:
-        engine = get_db_engine()
-        
-        # Calculate cutoff date (30 days ago from now in IST)
+        # Calculate cutoff date (30 days ago from now in IST), as a naive IST value
+        # matching the DATETIME column so the date index can be range-scanned
         current_time = datetime.now(TIMEZONE)
-        cutoff_date = current_time - timedelta(days=LAST_N_DAYS)
+        cutoff_date = (current_time - timedelta(days=LAST_N_DAYS)).replace(tzinfo=None)
         
         query = text("""
             SELECT 
@@ -150,11 +241,13 @@ def get_top_customers_last_30_days(top_n: int = 10) -> pd.DataFrame:
             GROUP BY c.customer_id, c.customer_name, c.mobile_number, c.region
             ORDER BY total_spent DESC
             LIMIT :top_n
-        """)
+        """).bindparams(
+            bindparam('cutoff_date', type_=DateTime),
+            bindparam('top_n', type_=Integer)
+        )
         
-        df = pd.read_sql(
-            query, 
-            engine,
+        df = _read_query(
+            query,
             params={
                 'cutoff_date': cutoff_date,
                 'top_n': top_n
@@ -183,12 +276,13 @@ def get_all_kpis() -> dict:
     try:
         logger.info("Calculating all KPIs...")
         
-        kpis = {
-            'repeat_customers': get_repeat_customers(),
-            'monthly_trends': get_monthly_order_trends(),
-            'regional_revenue': get_regional_revenue(),
-            'top_customers_last_30_days': get_top_customers_last_30_days()
-        }
+        # Independent queries run concurrently, each on its own pooled connection
+        kpis = run_parallel({
+            'repeat_customers': get_repeat_customers,
+            'monthly_trends': get_monthly_order_trends,
+            'regional_revenue': get_regional_revenue,
+            'top_customers_last_30_days': get_top_customers_last_30_days
+        })
         
         logger.info("All KPIs calculated successfully")
         return kpis
@@ -207,7 +301,15 @@ def export_kpis_to_excel(kpis: dict, output_file: str):
         output_file: Path to output Excel file
     """
     try:
-        with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
+        # xlsxwriter streams the workbook out without openpyxl's per-cell object model.
+        # constant_memory is not used: pandas writes cells column by column and that
+        # mode only accepts row-ordered writes (earlier rows' cells would be dropped).
+        with pd.ExcelWriter(
+            output_file,
+            engine='xlsxwriter',
+            datetime_format='yyyy-mm-dd hh:mm:ss',
+            engine_kwargs={'options': {'strings_to_urls': False}}
+        ) as writer:
             kpis['repeat_customers'].to_excel(
                 writer, sheet_name='Repeat Customers', index=False
             )
@@ -5,11 +5,13 @@ Utility modules for data loading, validation, and logging
 from .logger import setup_logger
 from .data_loader import load_customers_csv, load_orders_xml
 from .data_validator import validate_customer_data, validate_order_data
+from .parallel import run_parallel
 
 __all__ = [
     'setup_logger',
     'load_customers_csv',
     'load_orders_xml',
     'validate_customer_data',
-    'validate_order_data'
+    'validate_order_data',
+    'run_parallel'
 ]
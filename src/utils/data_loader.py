@@ -3,18 +3,56 @@ Data Loading Module
 Handles parsing and loading of CSV and XML data files
 """
 
+import hashlib
+import os
+import tempfile
+import warnings
+import numpy as np
 import pandas as pd
-import xml.etree.ElementTree as ET
+import pyarrow as pa
+import pyarrow.compute as pc
+from pyarrow import csv as pa_csv
+from pyarrow import feather as pa_feather
 from pathlib import Path
-from typing import Tuple, List, Dict
+from typing import Callable, Tuple, List, Dict, Iterator
 from datetime import datetime
 import pytz
 
-from src.config import CUSTOMERS_CSV_PATH, ORDERS_XML_PATH, TIMEZONE
+from src.config import CACHE_DIR, CUSTOMERS_CSV_PATH, ORDERS_XML_PATH, TIMEZONE
 from src.utils.logger import setup_logger
+from src.utils.parallel import run_parallel
+
+# Prefer lxml's C parser; fall back to the standard library if it is not installed
+try:
+    from lxml import etree
+    XMLParseError = etree.XMLSyntaxError
+    HAS_LXML = True
+except ImportError:
+    import xml.etree.ElementTree as etree
+    XMLParseError = etree.ParseError
+    HAS_LXML = False
 
 logger = setup_logger(__name__)
 
+# Customer CSV columns, all parsed as text (keeps mobile numbers' leading zeros)
+CUSTOMER_CSV_COLUMNS = ['customer_id', 'customer_name', 'mobile_number', 'region']
+
+# Read buffer for streaming the orders XML (1 MiB)
+XML_READ_BUFFER_SIZE = 1 << 20
+
+# Child elements of each <order> (one <order> per SKU line item)
+ORDER_XML_FIELDS = ('order_id', 'mobile_number', 'order_date_time', 'sku_id', 'sku_count', 'total_amount')
+
+
+# Offending order_ids listed when a required order field is blank
+MAX_REPORTED_ORDER_IDS = 5
+
+# Read size when hashing source files for the cache key (1 MiB)
+HASH_CHUNK_SIZE = 1 << 20
+
+# Bump whenever the parsers change the DataFrames they produce (invalidates old cache files)
+CACHE_VERSION = 1
+
 
 def load_customers_csv(file_path: Path = CUSTOMERS_CSV_PATH) -> pd.DataFrame:
     """
@@ -28,25 +66,33 @@ def load_customers_csv(file_path: Path = CUSTOMERS_CSV_PATH) -> pd.DataFrame:
         
     Raises:
         FileNotFoundError: If CSV file doesn't exist
-        pd.errors.EmptyDataError: If CSV file is empty
+        pa.ArrowInvalid: If CSV file is empty or malformed
     """
     try:
         logger.info(f"Loading customer data from {file_path}")
         
-        # Read CSV with explicit dtype for mobile_number to avoid scientific notation
-        df = pd.read_csv(
+        # Parse with the multi-threaded PyArrow reader into Arrow-backed string columns.
+        # Column types are fixed at parse time: pandas' engine='pyarrow' infers integers
+        # first and would drop leading zeros from mobile numbers.
+        table = pa_csv.read_csv(
             file_path,
-            dtype={'mobile_number': str}
+            convert_options=pa_csv.ConvertOptions(
+                column_types={col: pa.string() for col in CUSTOMER_CSV_COLUMNS},
+                strings_can_be_null=True
+            )
         )
+        df = table.to_pandas(types_mapper={pa.string(): pd.StringDtype('pyarrow')}.get)
         
         # Basic cleaning
         df = df.dropna(subset=['customer_id', 'mobile_number'])  # Remove rows with missing critical fields
-        df['customer_name'] = df['customer_name'].fillna('Unknown')  # Handle missing names
-        df['region'] = df['region'].fillna('Unknown')  # Handle missing regions
+        df = df.fillna({'customer_name': 'Unknown', 'region': 'Unknown'})  # Handle missing names/regions
         
         # Strip whitespace
-        for col in df.select_dtypes(include=['object']).columns:
-            df[col] = df[col].str.strip()
+        str_cols = df.select_dtypes(include='string').columns
+        df[str_cols] = df[str_cols].apply(lambda col: col.str.strip())
+        
+        # Low-cardinality region: categorical, so its distinct values are just the categories
+        df['region'] = df['region'].astype('category')
         
         logger.info(f"Successfully loaded {len(df)} customer records")
         return df
@@ -59,6 +105,142 @@ def load_customers_csv(file_path: Path = CUSTOMERS_CSV_PATH) -> pd.DataFrame:
         raise
 
 
+def _iter_order_elements(xml_file) -> Iterator:
+    """
+    Stream <order> elements from an XML file, freeing each one after use
+    
+    Args:
+        xml_file: Binary file object positioned at the start of the XML
+        
+    Yields:
+        Parsed <order> elements (valid until the next element is requested)
+    """
+    if HAS_LXML:
+        for _, order_elem in etree.iterparse(xml_file, events=('end',), tag='order'):
+            yield order_elem
+            
+            # Free the parsed element and any already-processed siblings
+            order_elem.clear()
+            while order_elem.getprevious() is not None:
+                del order_elem.getparent()[0]
+    else:
+        # ElementTree has no tag filter or parent links: clear processed children from the root
+        context = etree.iterparse(xml_file, events=('start', 'end'))
+        _, root = next(context)
+        for event, elem in context:
+            if event == 'end' and elem.tag == 'order':
+                yield elem
+                root.clear()
+
+
+def _parse_order_element(order_elem, columns: Dict[str, List[str]]):
+    """
+    Append the fields of one <order> element to the per-field column lists
+    
+    Values are kept as raw, untrimmed strings; trimming and type conversion
+    happen column-wise in load_orders_xml.
+    
+    Args:
+        order_elem: Parsed <order> XML element
+        columns: Raw string values keyed by field name (appended in place)
+    """
+    # One pass over the children instead of a findtext() search per field
+    values = {child.tag: child.text or '' for child in order_elem}
+    for field in ORDER_XML_FIELDS:
+        columns[field].append(values[field])
+
+
+def _parse_order_timestamps(values: pd.Series) -> pd.Series:
+    """
+    Parse ISO-8601 order timestamps into timezone-aware (IST) datetimes
+    
+    Naive timestamps are localized to TIMEZONE; timestamps with an offset
+    are converted to it.
+    
+    Args:
+        values: Series of ISO-8601 timestamp strings
+        
+    Returns:
+        Series of timezone-aware datetimes
+    """
+    with warnings.catch_warnings():
+        # Mixed offsets fall back below instead of warning about future behaviour
+        warnings.simplefilter('ignore', FutureWarning)
+        try:
+            timestamps = pd.to_datetime(values, format='ISO8601')
+        except ValueError:
+            timestamps = None
+    
+    if timestamps is None or not pd.api.types.is_datetime64_any_dtype(timestamps):
+        # Mix of naive and offset-aware strings: normalize each value individually
+        return pd.to_datetime(values.map(_parse_order_timestamp), utc=True).dt.tz_convert(TIMEZONE)
+    
+    if timestamps.dt.tz is None:
+        # ambiguous=False matches pytz's localize default (is_dst=False)
+        return timestamps.dt.tz_localize(
+            TIMEZONE,
+            ambiguous=np.zeros(len(timestamps), dtype=bool),
+            nonexistent='shift_forward'
+        )
+    
+    return timestamps.dt.tz_convert(TIMEZONE)
+
+
+def _parse_order_timestamp(value: str) -> datetime:
+    """
+    Parse a single ISO-8601 timestamp, localizing naive values to TIMEZONE
+    
+    Args:
+        value: ISO-8601 timestamp string
+        
+    Returns:
+        Timezone-aware datetime
+    """
+    order_date_time = datetime.fromisoformat(value)
+    if order_date_time.tzinfo is None:
+        order_date_time = TIMEZONE.localize(order_date_time)
+    
+    return order_date_time
+
+
+def _require_parsed(parsed: pd.Series, order_ids: pd.Series, field: str):
+    """
+    Reject blank values that column-wise parsing turned into NaT/NaN
+    
+    pd.to_datetime and pd.to_numeric map empty strings to missing values
+    instead of failing, so a blank field is caught here after parsing.
+    
+    Args:
+        parsed: Parsed column
+        order_ids: order_id of each row (aligned with parsed)
+        field: Field name for the error message
+        
+    Raises:
+        ValueError: If any parsed value is missing
+    """
+    missing = parsed.isna().to_numpy()
+    if missing.any():
+        bad_ids = order_ids[missing].head(MAX_REPORTED_ORDER_IDS).tolist()
+        raise ValueError(
+            f"Blank or invalid {field} in {int(missing.sum())} order rows (order_id: {bad_ids})"
+        )
+
+
+def _arrow_frame(fields: Dict[str, pa.Array], names: Tuple[str, ...]) -> pd.DataFrame:
+    """
+    Build a DataFrame of Arrow-backed string columns from Arrow arrays
+    
+    Args:
+        fields: Arrow string arrays keyed by field name
+        names: Fields to include, in column order
+        
+    Returns:
+        DataFrame with string[pyarrow] columns
+    """
+    table = pa.table({name: fields[name] for name in names})
+    return table.to_pandas(types_mapper={pa.string(): pd.StringDtype('pyarrow')}.get)
+
+
 def load_orders_xml(file_path: Path = ORDERS_XML_PATH) -> Tuple[pd.DataFrame, pd.DataFrame]:
     """
     Load and parse order data from XML file
@@ -75,51 +257,42 @@ def load_orders_xml(file_path: Path = ORDERS_XML_PATH) -> Tuple[pd.DataFrame, pd
         
     Raises:
         FileNotFoundError: If XML file doesn't exist
-        ET.ParseError: If XML is malformed
+        XMLParseError: If XML is malformed
     """
     try:
         logger.info(f"Loading order data from {file_path}")
         
-        # Parse XML
-        tree = ET.parse(file_path)
-        root = tree.getroot()
-        
-        # Extract all order records
-        order_items_list = []
-        orders_dict = {}  # To track unique orders
-        
-        for order_elem in root.findall('order'):
-            order_id = order_elem.find('order_id').text.strip()
-            mobile_number = order_elem.find('mobile_number').text.strip()
-            order_date_time_str = order_elem.find('order_date_time').text.strip()
-            sku_id = order_elem.find('sku_id').text.strip()
-            sku_count = int(order_elem.find('sku_count').text.strip())
-            total_amount = float(order_elem.find('total_amount').text.strip())
-            
-            # Parse and normalize datetime to timezone-aware (IST)
-            order_date_time = datetime.fromisoformat(order_date_time_str)
-            if order_date_time.tzinfo is None:
-                order_date_time = TIMEZONE.localize(order_date_time)
-            
-            # Store unique order (order_id is the key)
-            if order_id not in orders_dict:
-                orders_dict[order_id] = {
-                    'order_id': order_id,
-                    'mobile_number': mobile_number,
-                    'order_date_time': order_date_time,
-                    'total_amount': total_amount
-                }
-            
-            # Store order item (SKU line item)
-            order_items_list.append({
-                'order_id': order_id,
-                'sku_id': sku_id,
-                'sku_count': sku_count
-            })
+        # Extract all order records as raw string columns
+        columns = {field: [] for field in ORDER_XML_FIELDS}
+        
+        # Stream <order> elements through a buffered reader instead of building the full tree
+        with open(file_path, 'rb', buffering=XML_READ_BUFFER_SIZE) as xml_file:
+            for order_elem in _iter_order_elements(xml_file):
+                _parse_order_element(order_elem, columns)
         
-        # Create DataFrames
-        orders_df = pd.DataFrame(list(orders_dict.values()))
-        order_items_df = pd.DataFrame(order_items_list)
+        # Trim whitespace with one Arrow kernel per column instead of str.strip() per value
+        fields = {
+            field: pc.utf8_trim_whitespace(pa.array(values, type=pa.string()))
+            for field, values in columns.items()
+        }
+        
+        # Create DataFrames with Arrow-backed text columns (as in the customers frame);
+        # orders keep the first line item's order-level fields
+        orders_df = _arrow_frame(
+            fields, ('order_id', 'mobile_number', 'order_date_time', 'total_amount')
+        ).drop_duplicates(subset='order_id', keep='first', ignore_index=True)
+        order_items_df = _arrow_frame(fields, ('order_id', 'sku_id', 'sku_count'))
+        
+        # Convert types column-wise instead of per element
+        orders_df['order_date_time'] = _parse_order_timestamps(orders_df['order_date_time'])
+        orders_df['total_amount'] = pd.to_numeric(orders_df['total_amount']).astype('float64')
+        sku_counts = pd.to_numeric(order_items_df['sku_count'])
+        
+        # Blank fields parse to NaT/NaN; fail loudly like the per-element parsers did
+        _require_parsed(orders_df['order_date_time'], orders_df['order_id'], 'order_date_time')
+        _require_parsed(orders_df['total_amount'], orders_df['order_id'], 'total_amount')
+        _require_parsed(sku_counts, order_items_df['order_id'], 'sku_count')
+        order_items_df['sku_count'] = sku_counts.astype('int64')
         
         logger.info(f"Successfully loaded {len(orders_df)} orders with {len(order_items_df)} line items")
         return orders_df, order_items_df
@@ -127,7 +300,7 @@ def load_orders_xml(file_path: Path = ORDERS_XML_PATH) -> Tuple[pd.DataFrame, pd
     except FileNotFoundError:
         logger.error(f"Orders XML file not found at {file_path}")
         raise
-    except ET.ParseError as e:
+    except XMLParseError as e:
         logger.error(f"XML parsing error: {str(e)}")
         raise
     except Exception as e:
@@ -135,14 +308,147 @@ def load_orders_xml(file_path: Path = ORDERS_XML_PATH) -> Tuple[pd.DataFrame, pd
         raise
 
 
-def load_all_data() -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+def _source_cache_key(file_path: Path) -> str:
+    """
+    Hash a source data file into a short cache key
+    
+    Args:
+        file_path: Path to the source file
+        
+    Returns:
+        First 12 hex digits of the MD5 over the file contents
+    """
+    digest = hashlib.md5()
+    with open(file_path, 'rb') as source_file:
+        for chunk in iter(lambda: source_file.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    
+    return digest.hexdigest()[:12]
+
+
+def _read_cache_file(cache_file: Path) -> pd.DataFrame:
+    """
+    Read a cached DataFrame, restoring Arrow-backed string columns
+    
+    Args:
+        cache_file: Path to the Feather file
+        
+    Returns:
+        Cached DataFrame
+    """
+    df = pa_feather.read_table(cache_file).to_pandas()
+    
+    # The stored pandas metadata only records "string", which restores Python-backed
+    # storage (and plain object categories for categoricals)
+    str_cols = df.select_dtypes(include='string').columns
+    df = df.astype({col: pd.StringDtype('pyarrow') for col in str_cols})
+    
+    for col in df.select_dtypes(include='category').columns:
+        categories = df[col].cat.categories
+        if categories.dtype == object:
+            df[col] = df[col].cat.rename_categories(categories.astype(pd.StringDtype('pyarrow')))
+    
+    return df
+
+
+def _write_cache_file(df: pd.DataFrame, cache_file: Path):
+    """
+    Write a DataFrame to the cache atomically
+    
+    The Feather file is written under a temporary name in the cache directory
+    and then renamed into place, so readers never see a partial file.
+    
+    Args:
+        df: DataFrame to cache (default index)
+        cache_file: Final path of the Feather file
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=cache_file.parent, suffix='.tmp')
+    os.close(fd)
+    try:
+        pa_feather.write_feather(df, tmp_path)
+        os.replace(tmp_path, cache_file)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def _load_cached(file_path: Path, tables: Tuple[str, ...], loader: Callable,
+                 use_cache: bool) -> Tuple[pd.DataFrame, ...]:
+    """
+    Load the DataFrames parsed from a source file, going through the on-disk Feather cache if enabled
+    
+    Cache files are named <source stem>_<content hash>_v<CACHE_VERSION>_<timezone>_<table>.feather,
+    so any change to the source file, the parsers or the configured timezone
+    triggers a fresh parse. Unreadable cache files are deleted and re-parsed.
+    
+    Args:
+        file_path: Path to the source file
+        tables: Names of the DataFrames returned by loader
+        loader: Parser returning the DataFrames (in tables order)
+        use_cache: Read from / write to the Feather cache
+        
+    Returns:
+        Tuple of DataFrames
+    """
+    if not use_cache:
+        frames = loader(file_path)
+        return frames if isinstance(frames, tuple) else (frames,)
+    
+    cache_key = _source_cache_key(file_path)
+    timezone_name = str(TIMEZONE).replace('/', '-')
+    cache_files = [
+        CACHE_DIR / f"{file_path.stem}_{cache_key}_v{CACHE_VERSION}_{timezone_name}_{table}.feather"
+        for table in tables
+    ]
+    
+    if all(cache_file.exists() for cache_file in cache_files):
+        try:
+            frames = tuple(_read_cache_file(cache_file) for cache_file in cache_files)
+            logger.info(f"Loaded cached {file_path.name} data from {CACHE_DIR} (key {cache_key})")
+            return frames
+        except (OSError, ValueError, TypeError, pa.ArrowException) as e:
+            logger.warning(f"Discarding unreadable {file_path.name} cache, re-parsing: {str(e)}")
+            for cache_file in cache_files:
+                cache_file.unlink(missing_ok=True)
+    
+    frames = loader(file_path)
+    if not isinstance(frames, tuple):
+        frames = (frames,)
+    
+    # Feather requires a default index
+    frames = tuple(df.reset_index(drop=True) for df in frames)
+    
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        for df, cache_file in zip(frames, cache_files):
+            _write_cache_file(df, cache_file)
+        logger.info(f"Cached parsed {file_path.name} data in {CACHE_DIR} (key {cache_key})")
+    except OSError as e:
+        logger.warning(f"Failed to write data cache: {str(e)}")
+    
+    return frames
+
+
+def load_all_data(use_cache: bool = True) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
     """
     Convenience function to load all data sources
     
+    Args:
+        use_cache: Reuse DataFrames cached on disk for unchanged source files
+    
     Returns:
         Tuple of (customers_df, orders_df, order_items_df)
     """
-    customers_df = load_customers_csv()
-    orders_df, order_items_df = load_orders_xml()
+    # CSV and XML are independent; both parsers do their heavy lifting outside the GIL
+    results = run_parallel({
+        'customers': lambda: _load_cached(
+            CUSTOMERS_CSV_PATH, ('customers',), load_customers_csv, use_cache
+        ),
+        'orders': lambda: _load_cached(
+            ORDERS_XML_PATH, ('orders', 'order_items'), load_orders_xml, use_cache
+        )
+    })
+    (customers_df,) = results['customers']
+    orders_df, order_items_df = results['orders']
     
     return customers_df, orders_df, order_items_df
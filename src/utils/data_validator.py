@@ -4,19 +4,128 @@ Validates data integrity and business rules
 """
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 import re
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 from src.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# Valid mobile numbers are exactly this many ASCII digits
+MOBILE_NUMBER_LENGTH = 10
 
-def validate_customer_data(df: pd.DataFrame) -> Dict[str, Any]:
+# Required columns per input table
+CUSTOMER_REQUIRED_COLUMNS = ['customer_id', 'customer_name', 'mobile_number', 'region']
+ORDER_REQUIRED_COLUMNS = ['order_id', 'mobile_number', 'order_date_time', 'total_amount']
+ORDER_ITEM_REQUIRED_COLUMNS = ['order_id', 'sku_id', 'sku_count']
+
+
+def _missing_columns(df: pd.DataFrame, required_cols: List[str]) -> List[str]:
+    """
+    List required columns absent from a DataFrame, in required order
+    
+    Args:
+        df: DataFrame to check
+        required_cols: Column names that must be present
+        
+    Returns:
+        Missing column names
+    """
+    present = set(df.columns)
+    return [col for col in required_cols if col not in present]
+
+
+def _count_invalid_mobiles(mobiles: pd.Series) -> int:
+    """
+    Count mobile numbers that are missing or not exactly 10 digits
+    
+    Runs Arrow compute kernels directly on the string buffers (zero-copy for
+    Arrow-backed columns): the length check reads only the offsets, and nulls
+    stay in the validity bitmap instead of going through pandas' masked
+    boolean round-trips. Same result as pc.match_substring_regex with
+    ^[0-9]{10}$, without running a regex per value.
+    
+    Args:
+        mobiles: Series of mobile numbers
+        
+    Returns:
+        Number of invalid or missing mobile numbers
+    """
+    values = pa.array(mobiles, type=pa.string(), from_pandas=True)
+    valid = pc.and_(
+        pc.equal(pc.binary_length(values), MOBILE_NUMBER_LENGTH),
+        pc.ascii_is_decimal(values)
+    )
+    valid = pc.fill_null(valid, False)
+    return len(values) - pc.sum(valid, min_count=0).as_py()
+
+
+def _count_distinct(values: pd.Series) -> int:
+    """
+    Count distinct non-missing values of a column
+    
+    Arrow-backed columns go straight to the pc.count_distinct kernel on the
+    underlying Arrow data, skipping the pandas nunique wrapper; other dtypes
+    use nunique.
+    
+    Args:
+        values: Series to inspect
+        
+    Returns:
+        Number of distinct non-missing values
+    """
+    if isinstance(values.dtype, (pd.StringDtype, pd.ArrowDtype)) and values.dtype.storage == 'pyarrow':
+        return pc.count_distinct(pa.array(values.array), mode='only_valid').as_py()
+    
+    return int(values.nunique())
+
+
+def _distinct_values(values: pd.Series) -> List:
+    """
+    List the distinct values of a column
+    
+    Categorical columns return their categories directly (no scan of the data).
+    
+    Args:
+        values: Series to inspect
+        
+    Returns:
+        List of distinct values
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.categories.tolist()
+    
+    return values.unique().tolist()
+
+
+def _datetime_range(dates: pd.Series) -> Tuple[Any, Any]:
+    """
+    Find the earliest and latest value of a datetime column
+    
+    Without missing values, the extremes are located with argmin/argmax on
+    the raw int64 view, skipping pandas' NaT-masking reductions.
+    
+    Args:
+        dates: Datetime Series (naive or timezone-aware)
+        
+    Returns:
+        Tuple of (min, max)
+    """
+    if dates.empty or not pd.api.types.is_datetime64_any_dtype(dates) or dates.hasnans:
+        return dates.min(), dates.max()
+    
+    values = dates.array.asi8
+    return dates.iat[values.argmin()], dates.iat[values.argmax()]
+
+
+def validate_customer_data(df: pd.DataFrame, include_stats: bool = True) -> Dict[str, Any]:
     """
     Validate customer data for completeness and correctness
     
     Args:
         df: Customer DataFrame
+        include_stats: Compute summary statistics (skip for checks-only validation)
         
     Returns:
         Dictionary with validation results
@@ -30,54 +139,59 @@ def validate_customer_data(df: pd.DataFrame) -> Dict[str, Any]:
     
     try:
         # Check required columns
-        required_cols = ['customer_id', 'customer_name', 'mobile_number', 'region']
-        missing_cols = [col for col in required_cols if col not in df.columns]
+        missing_cols = _missing_columns(df, CUSTOMER_REQUIRED_COLUMNS)
         if missing_cols:
             validation_results['is_valid'] = False
             validation_results['errors'].append(f"Missing required columns: {missing_cols}")
             return validation_results
         
-        # Check for duplicates
-        duplicates = df[df.duplicated(subset=['customer_id'], keep=False)]
-        if not duplicates.empty:
+        # Count customer_ids once; the counts give both duplicates and the unique total.
+        # Missing ids form their own group so they count as duplicates, as with
+        # duplicated(keep=False), but are left out of the unique total.
+        id_counts = df['customer_id'].value_counts(dropna=False)
+        duplicate_count = int(id_counts[id_counts > 1].sum())
+        if duplicate_count:
             validation_results['warnings'].append(
-                f"Found {len(duplicates)} duplicate customer_id records"
+                f"Found {duplicate_count} duplicate customer_id records"
             )
         
         # Validate mobile number format (should be 10 digits)
-        invalid_mobiles = df[~df['mobile_number'].str.match(r'^\d{10}$', na=False)]
-        if not invalid_mobiles.empty:
+        invalid_mobile_count = _count_invalid_mobiles(df['mobile_number'])
+        if invalid_mobile_count:
             validation_results['warnings'].append(
-                f"Found {len(invalid_mobiles)} invalid mobile number formats"
+                f"Found {invalid_mobile_count} invalid mobile number formats"
             )
         
-        # Check for missing values
-        null_counts = df[required_cols].isnull().sum()
-        if null_counts.any():
+        # Check for missing values column by column (no sliced frame or boolean DataFrame)
+        null_counts = {col: int(df[col].isna().sum()) for col in CUSTOMER_REQUIRED_COLUMNS}
+        missing_values = {col: count for col, count in null_counts.items() if count > 0}
+        if missing_values:
             validation_results['warnings'].append(
-                f"Missing values detected: {null_counts[null_counts > 0].to_dict()}"
+                f"Missing values detected: {missing_values}"
             )
         
         # Statistics
-        validation_results['stats'] = {
-            'total_records': len(df),
-            'unique_customers': df['customer_id'].nunique(),
-            'regions': df['region'].unique().tolist()
-        }
+        if include_stats:
+            validation_results['stats'] = {
+                'total_records': len(df),
+                'unique_customers': len(id_counts) - int(id_counts.index.isna().any()),
+                'regions': _distinct_values(df['region'])
+            }
         
-        logger.info(f"Customer data validation completed: {validation_results['stats']}")
+        logger.info("Customer data validation completed: %s", validation_results['stats'])
         
     except Exception as e:
         validation_results['is_valid'] = False
         validation_results['errors'].append(f"Validation error: {str(e)}")
-        logger.error(f"Error validating customer data: {str(e)}")
+        logger.error("Error validating customer data: %s", e)
     
     return validation_results
 
 
 def validate_order_data(
     orders_df: pd.DataFrame,
-    order_items_df: pd.DataFrame
+    order_items_df: pd.DataFrame,
+    include_stats: bool = True
 ) -> Dict[str, Any]:
     """
     Validate order and order items data
@@ -85,6 +199,7 @@ def validate_order_data(
     Args:
         orders_df: Orders DataFrame
         order_items_df: Order items DataFrame
+        include_stats: Compute summary statistics (skip for checks-only validation)
         
     Returns:
         Dictionary with validation results
@@ -98,58 +213,58 @@ def validate_order_data(
     
     try:
         # Check required columns for orders
-        required_order_cols = ['order_id', 'mobile_number', 'order_date_time', 'total_amount']
-        missing_cols = [col for col in required_order_cols if col not in orders_df.columns]
+        missing_cols = _missing_columns(orders_df, ORDER_REQUIRED_COLUMNS)
         if missing_cols:
             validation_results['is_valid'] = False
             validation_results['errors'].append(f"Missing required order columns: {missing_cols}")
             return validation_results
         
         # Check required columns for order items
-        required_item_cols = ['order_id', 'sku_id', 'sku_count']
-        missing_cols = [col for col in required_item_cols if col not in order_items_df.columns]
+        missing_cols = _missing_columns(order_items_df, ORDER_ITEM_REQUIRED_COLUMNS)
         if missing_cols:
             validation_results['is_valid'] = False
             validation_results['errors'].append(f"Missing required item columns: {missing_cols}")
             return validation_results
         
-        # Validate order_id consistency
-        order_ids_in_orders = set(orders_df['order_id'].unique())
-        order_ids_in_items = set(order_items_df['order_id'].unique())
+        # Validate order_id consistency (hash-based membership test, no Python sets)
+        orphan_items = ~order_items_df['order_id'].isin(orders_df['order_id'])
+        orphan_count = int(orphan_items.sum())
         
-        if order_ids_in_items - order_ids_in_orders:
+        if orphan_count:
             validation_results['warnings'].append(
-                "Some order_ids in items are not in orders table"
+                f"Some order_ids in items are not in orders table ({orphan_count} line items)"
             )
         
-        # Check for negative amounts
-        negative_amounts = orders_df[orders_df['total_amount'] < 0]
-        if not negative_amounts.empty:
+        # Check for negative amounts (counted on the raw column, no row slice)
+        negative_amount_count = int((orders_df['total_amount'].to_numpy() < 0).sum())
+        if negative_amount_count:
             validation_results['warnings'].append(
-                f"Found {len(negative_amounts)} orders with negative amounts"
+                f"Found {negative_amount_count} orders with negative amounts"
             )
         
         # Check for invalid SKU counts
-        invalid_counts = order_items_df[order_items_df['sku_count'] <= 0]
-        if not invalid_counts.empty:
+        invalid_sku_count = int((order_items_df['sku_count'].to_numpy() <= 0).sum())
+        if invalid_sku_count:
             validation_results['warnings'].append(
-                f"Found {len(invalid_counts)} items with invalid SKU counts"
+                f"Found {invalid_sku_count} items with invalid SKU counts"
             )
         
         # Statistics
-        validation_results['stats'] = {
-            'total_orders': len(orders_df),
-            'total_line_items': len(order_items_df),
-            'unique_customers': orders_df['mobile_number'].nunique(),
-            'date_range': f"{orders_df['order_date_time'].min()} to {orders_df['order_date_time'].max()}",
-            'total_revenue': float(orders_df['total_amount'].sum())
-        }
+        if include_stats:
+            first_order, last_order = _datetime_range(orders_df['order_date_time'])
+            validation_results['stats'] = {
+                'total_orders': len(orders_df),
+                'total_line_items': len(order_items_df),
+                'unique_customers': _count_distinct(orders_df['mobile_number']),
+                'date_range': f"{first_order} to {last_order}",
+                'total_revenue': float(orders_df['total_amount'].sum())
+            }
         
-        logger.info(f"Order data validation completed: {validation_results['stats']}")
+        logger.info("Order data validation completed: %s", validation_results['stats'])
         
     except Exception as e:
         validation_results['is_valid'] = False
         validation_results['errors'].append(f"Validation error: {str(e)}")
-        logger.error(f"Error validating order data: {str(e)}")
+        logger.error("Error validating order data: %s", e)
     
     return validation_results
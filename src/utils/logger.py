@@ -3,17 +3,87 @@ Logging Configuration Module
 Provides centralized logging setup for the application
 """
 
+import atexit
+import functools
 import logging
+import queue
 import sys
+import threading
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 from datetime import datetime
+from typing import Dict
 from src.config import LOGS_DIR, LOG_LEVEL
 
+# Resolved once at import rather than on every setup_logger call
+_LEVEL = getattr(logging, LOG_LEVEL)
+DEFAULT_LOG_FILE = f"pipeline_{datetime.now().strftime('%Y%m%d')}.log"
 
+DETAILED_FORMATTER = logging.Formatter(
+    '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+
+# Console handler shared by all loggers (synchronous, so it stays ordered with print() output)
+_console_handler = logging.StreamHandler(sys.stdout)
+_console_handler.setLevel(logging.INFO)
+_console_handler.setFormatter(DETAILED_FORMATTER)
+
+# Queue handlers per log file; a background listener thread does the file writes
+_file_queue_handlers: Dict[str, QueueHandler] = {}
+_file_queue_lock = threading.Lock()
+
+
+def _get_file_queue_handler(log_file: str) -> QueueHandler:
+    """
+    Get the queue handler feeding a log file, starting its writer thread on first use
+    
+    Log calls only enqueue the record; a QueueListener thread formats it and
+    writes it to the file, so file I/O stays off the calling thread. All
+    loggers writing to the same file share one handler.
+    
+    Args:
+        log_file: Log file name (inside LOGS_DIR)
+        
+    Returns:
+        QueueHandler to attach to loggers
+    """
+    with _file_queue_lock:
+        if log_file not in _file_queue_handlers:
+            file_handler = logging.FileHandler(LOGS_DIR / log_file, delay=True)
+            file_handler.setLevel(logging.DEBUG)
+            file_handler.setFormatter(DETAILED_FORMATTER)
+            
+            log_queue = queue.SimpleQueue()
+            listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+            listener.start()
+            
+            # Drain queued records before logging's own shutdown closes the file
+            atexit.register(listener.stop)
+            
+            _file_queue_handlers[log_file] = QueueHandler(log_queue)
+        
+        return _file_queue_handlers[log_file]
+
+
+# Shared handlers live on the root logger; module loggers propagate to them
+_root_logger = logging.getLogger()
+_root_logger.addHandler(_console_handler)
+_root_logger.addHandler(_get_file_queue_handler(DEFAULT_LOG_FILE))
+
+
+@functools.lru_cache(maxsize=None)
 def setup_logger(name: str, log_file: str = None) -> logging.Logger:
     """
     Setup and configure logger with file and console handlers
     
+    Loggers propagate to the console and default log file handlers attached
+    once to the root logger. A logger given its own log_file gets the console
+    handler plus that file instead, and does not propagate.
+    
+    Results are memoized per (name, log_file); the level, formatter, handlers
+    and default log file are resolved once at import.
+    
     Args:
         name: Logger name (typically module name)
         log_file: Optional specific log file name
@@ -22,31 +92,13 @@ def setup_logger(name: str, log_file: str = None) -> logging.Logger:
         Configured logger instance
     """
     logger = logging.getLogger(name)
-    logger.setLevel(getattr(logging, LOG_LEVEL))
-    
-    # Avoid duplicate handlers
-    if logger.handlers:
-        return logger
-    
-    # Create formatters
-    detailed_formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    
-    # Console Handler
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setLevel(logging.INFO)
-    console_handler.setFormatter(detailed_formatter)
-    logger.addHandler(console_handler)
-    
-    # File Handler
-    if log_file is None:
-        log_file = f"pipeline_{datetime.now().strftime('%Y%m%d')}.log"
+    logger.setLevel(_LEVEL)
     
-    file_handler = logging.FileHandler(LOGS_DIR / log_file)
-    file_handler.setLevel(logging.DEBUG)
-    file_handler.setFormatter(detailed_formatter)
-    logger.addHandler(file_handler)
+    if log_file is not None and log_file != DEFAULT_LOG_FILE:
+        # Dedicated log file (avoid duplicate handlers)
+        if not logger.handlers:
+            logger.addHandler(_console_handler)
+            logger.addHandler(_get_file_queue_handler(log_file))
+        logger.propagate = False
     
     return logger
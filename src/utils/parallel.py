@@ -0,0 +1,35 @@
+"""
+Parallel Execution Module
+Runs independent pipeline tasks concurrently in a thread pool
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+
+def run_parallel(
+    tasks: Dict[str, Callable[[], Any]],
+    max_workers: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Run independent zero-argument callables concurrently
+    
+    Threads are sufficient here: pandas/NumPy kernels and database drivers
+    release the GIL while doing the heavy work.
+    
+    Args:
+        tasks: Mapping of task name to zero-argument callable
+        max_workers: Maximum number of worker threads (defaults to one per task)
+        
+    Returns:
+        Dictionary mapping each task name to its result, in input order
+        
+    Raises:
+        Exception: Re-raises the exception of the first failed task
+    """
+    if not tasks:
+        return {}
+    
+    with ThreadPoolExecutor(max_workers=max_workers or len(tasks)) as executor:
+        futures = {name: executor.submit(task) for name, task in tasks.items()}
+        return {name: future.result() for name, future in futures.items()}
@@ -1,31 +1,50 @@
 """
 Test script to verify data loading and validation
+
+Run with pytest, or directly: python test_data_loading.py
 """
 
+import logging
 import sys
 from pathlib import Path
 
+import pandas as pd
+import pytest
+
 # Add project root to path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from src.utils.data_loader import load_all_data
-from src.utils.data_validator import validate_customer_data, validate_order_data
+from src.config import TIMEZONE
+from src.utils import data_loader
+from src.utils.data_loader import load_all_data, load_orders_xml
+from src.utils.data_validator import (
+    validate_customer_data,
+    validate_order_data,
+    _count_distinct,
+    _count_invalid_mobiles,
+    _datetime_range,
+    _distinct_values
+)
 from src.utils.logger import setup_logger
+from src.utils.parallel import run_parallel
 
 logger = setup_logger(__name__)
 
 
-def test_data_loading():
+def test_data_loading(source_data):
     """Test data loading functionality"""
     logger.info("=" * 60)
-    logger.info("TESTING DATA LOADING AND VALIDATION")
+    logger.info("TESTING DATA LOADING")
     logger.info("=" * 60)
     
-    try:
-        # Load all data
-        customers_df, orders_df, order_items_df = load_all_data()
-        
-        # Display data samples
+    customers_df, orders_df, order_items_df = source_data
+    
+    assert not customers_df.empty, "No customers loaded"
+    assert not orders_df.empty, "No orders loaded"
+    assert not order_items_df.empty, "No order items loaded"
+    
+    # Display data samples (skipped when the log level hides INFO output)
+    if logger.isEnabledFor(logging.INFO):
         logger.info("\n--- CUSTOMERS DATA (Sample) ---")
         print(customers_df.head())
         print(f"\nShape: {customers_df.shape}")
@@ -37,41 +56,135 @@ def test_data_loading():
         logger.info("\n--- ORDER ITEMS DATA (Sample) ---")
         print(order_items_df.head(10))
         print(f"\nShape: {order_items_df.shape}")
-        
-        # Validate data
-        logger.info("\n" + "=" * 60)
-        logger.info("VALIDATING DATA")
-        logger.info("=" * 60)
-        
-        customer_validation = validate_customer_data(customers_df)
-        order_validation = validate_order_data(orders_df, order_items_df)
-        
-        # Display validation results
-        logger.info("\n--- CUSTOMER DATA VALIDATION ---")
-        print(f"Valid: {customer_validation['is_valid']}")
-        print(f"Errors: {customer_validation['errors']}")
-        print(f"Warnings: {customer_validation['warnings']}")
-        print(f"Stats: {customer_validation['stats']}")
-        
-        logger.info("\n--- ORDER DATA VALIDATION ---")
-        print(f"Valid: {order_validation['is_valid']}")
-        print(f"Errors: {order_validation['errors']}")
-        print(f"Warnings: {order_validation['warnings']}")
-        print(f"Stats: {order_validation['stats']}")
-        
-        logger.info("\n" + "=" * 60)
-        logger.info("DATA LOADING TEST COMPLETED SUCCESSFULLY!")
-        logger.info("=" * 60)
-        
-        return True
-        
-    except Exception as e:
-        logger.error(f"Test failed with error: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        return False
+
+
+def test_data_validation(source_data):
+    """Test customer and order validation"""
+    logger.info("\n" + "=" * 60)
+    logger.info("VALIDATING DATA")
+    logger.info("=" * 60)
+    
+    customers_df, orders_df, order_items_df = source_data
+    
+    # Validators are independent; run them concurrently
+    validations = run_parallel({
+        'customers': lambda: validate_customer_data(customers_df),
+        'orders': lambda: validate_order_data(orders_df, order_items_df)
+    })
+    customer_validation = validations['customers']
+    order_validation = validations['orders']
+    
+    # Display validation results
+    logger.info("\n--- CUSTOMER DATA VALIDATION ---")
+    print(f"Valid: {customer_validation['is_valid']}")
+    print(f"Errors: {customer_validation['errors']}")
+    print(f"Warnings: {customer_validation['warnings']}")
+    print(f"Stats: {customer_validation['stats']}")
+    
+    logger.info("\n--- ORDER DATA VALIDATION ---")
+    print(f"Valid: {order_validation['is_valid']}")
+    print(f"Errors: {order_validation['errors']}")
+    print(f"Warnings: {order_validation['warnings']}")
+    print(f"Stats: {order_validation['stats']}")
+    
+    assert customer_validation['is_valid'], customer_validation['errors']
+    assert order_validation['is_valid'], order_validation['errors']
+    
+    logger.info("\n" + "=" * 60)
+    logger.info("DATA LOADING TEST COMPLETED SUCCESSFULLY!")
+    logger.info("=" * 60)
+
+
+def test_cache_round_trip(tmp_path, monkeypatch):
+    """Test that frames read back from the Feather cache equal freshly parsed ones, dtypes included"""
+    monkeypatch.setattr(data_loader, 'CACHE_DIR', tmp_path)
+    
+    fresh = load_all_data(use_cache=False)
+    written = load_all_data(use_cache=True)
+    assert len(list(tmp_path.glob('*.feather'))) == 3
+    
+    # A cache hit must not parse the sources again
+    def fail_parse(file_path):
+        raise AssertionError(f"{file_path} parsed despite a warm cache")
+    monkeypatch.setattr(data_loader, 'load_customers_csv', fail_parse)
+    monkeypatch.setattr(data_loader, 'load_orders_xml', fail_parse)
+    cached = load_all_data(use_cache=True)
+    
+    for fresh_df, written_df, cached_df in zip(fresh, written, cached):
+        pd.testing.assert_frame_equal(written_df, fresh_df)
+        pd.testing.assert_frame_equal(cached_df, fresh_df)
+
+
+@pytest.mark.parametrize('dtype', ['string[pyarrow]', object])
+def test_count_invalid_mobiles(dtype):
+    """Test that only exactly-10-digit mobile numbers count as valid"""
+    mobiles = pd.Series(
+        ['9123456781', '12345', '91234567ab', None, '9123456781 ', '91234567890', '0123456789'],
+        dtype=dtype
+    )
+    assert _count_invalid_mobiles(mobiles) == 5
+
+
+@pytest.mark.parametrize('dtype', ['string[pyarrow]', 'string[python]', object, 'category'])
+def test_count_distinct(dtype):
+    """Test that distinct counts skip missing values like nunique, for every string dtype"""
+    values = pd.Series(['a', 'b', 'a', None, 'c', 'b'], dtype=dtype)
+    assert _count_distinct(values) == 3
+
+
+def test_distinct_values():
+    """Test that categoricals report their categories and other dtypes their unique values"""
+    regions = pd.Series(['North', 'South', 'North'], dtype=pd.CategoricalDtype(['North', 'South', 'West']))
+    assert _distinct_values(regions) == ['North', 'South', 'West']
+    assert _distinct_values(regions.astype(object)) == ['North', 'South']
+
+
+def test_datetime_range():
+    """Test min/max lookup on unsorted, missing-value and empty datetime columns"""
+    dates = pd.Series(pd.to_datetime(['2025-10-02', '2025-09-20', '2025-11-01'])).dt.tz_localize(TIMEZONE)
+    assert _datetime_range(dates) == (dates.iat[1], dates.iat[2])
+    
+    with_missing = pd.concat([dates, pd.Series([pd.NaT], dtype=dates.dtype)], ignore_index=True)
+    assert _datetime_range(with_missing) == (dates.iat[1], dates.iat[2])
+    
+    first, last = _datetime_range(dates.iloc[:0])
+    assert pd.isna(first) and pd.isna(last)
+
+
+ORDER_XML_TEMPLATE = """<orders>
+  <order>
+    <order_id>ORD-1</order_id>
+    <mobile_number>9000000001</mobile_number>
+    <order_date_time>2025-10-12T09:15:32</order_date_time>
+    <sku_id>SKU-1</sku_id>
+    <sku_count>2</sku_count>
+    <total_amount>100</total_amount>
+  </order>
+  <order>
+    <order_id>ORD-2</order_id>
+    <mobile_number>9000000002</mobile_number>
+    <order_date_time>{order_date_time}</order_date_time>
+    <sku_id>SKU-2</sku_id>
+    <sku_count>{sku_count}</sku_count>
+    <total_amount>{total_amount}</total_amount>
+  </order>
+</orders>
+"""
+
+
+@pytest.mark.parametrize('field, fields', [
+    ('order_date_time', {'order_date_time': '', 'sku_count': '1', 'total_amount': '50'}),
+    ('total_amount', {'order_date_time': '2025-10-13T10:00:00', 'sku_count': '1', 'total_amount': ''}),
+    ('sku_count', {'order_date_time': '2025-10-13T10:00:00', 'sku_count': ' ', 'total_amount': '50'}),
+])
+def test_blank_order_fields_rejected(tmp_path, field, fields):
+    """Test that a blank order field fails the load and names the order"""
+    xml_file = tmp_path / "orders.xml"
+    xml_file.write_text(ORDER_XML_TEMPLATE.format(**fields))
+    
+    with pytest.raises(ValueError, match=rf"{field}.*ORD-2"):
+        load_orders_xml(xml_file)
 
 
 if __name__ == "__main__":
-    success = test_data_loading()
-    sys.exit(0 if success else 1)
+    sys.exit(pytest.main([__file__, "-s"]))
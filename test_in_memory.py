@@ -1,53 +1,257 @@
 """
 Test script for in-memory (Pandas) approach
 Tests data loading and KPI calculations using DataFrames
+
+Run with pytest, or directly: python test_in_memory.py
 """
 
+import logging
 import sys
+from datetime import datetime
 from pathlib import Path
 
+import pandas as pd
+import pytest
+
 # Add project root to path
 sys.path.insert(0, str(Path(__file__).parent))
 
+from src.config import TIMEZONE
+from src.in_memory import data_processor
 from src.in_memory.data_processor import DataProcessor
-from src.in_memory.kpi_calculator import calculate_all_kpis, export_kpis_to_excel
-from src.config import RESULTS_DIR
+from src.in_memory.kpi_calculator import (
+    calculate_all_kpis,
+    calculate_monthly_trends,
+    calculate_regional_revenue,
+    calculate_repeat_customers,
+    calculate_top_customers_last_30_days,
+    export_kpis_to_excel
+)
 from src.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+KPI_KEYS = ['repeat_customers', 'monthly_trends', 'regional_revenue', 'top_customers_last_30_days']
 
-def test_in_memory_approach():
-    """
-    Complete test of in-memory approach using pandas
-    """
+
+@pytest.fixture(scope="module")
+def processor(source_data):
+    """Data processor over copies of the shared source data (load_data mutates its frames)"""
     logger.info("=" * 70)
     logger.info("TESTING IN-MEMORY APPROACH (Pandas)")
     logger.info("=" * 70)
     
-    try:
-        # Step 1: Load data
-        logger.info("\n--- Step 1: Loading Data into DataFrames ---")
-        processor = DataProcessor()
-        customers_df, orders_df, order_items_df = processor.load_data()
-        print("✅ Data loaded into DataFrames")
-        
-        # Step 2: Display data summary
-        logger.info("\n--- Step 2: Data Summary ---")
-        summary = processor.get_data_summary()
-        print("\nData Summary:")
-        print(f"  Customers: {summary['customers']['count']} records")
-        print(f"  Regions: {summary['customers']['regions']}")
-        print(f"  Orders: {summary['orders']['count']} records")
-        print(f"  Date Range: {summary['orders']['date_range']}")
-        print(f"  Total Revenue: ₹{summary['orders']['total_revenue']:,.2f}")
-        print(f"  Order Items: {summary['order_items']['count']} line items")
-        print(f"  Unique SKUs: {summary['order_items']['unique_skus']}")
-        
-        # Step 3: Calculate KPIs
-        logger.info("\n--- Step 3: Calculating KPIs ---")
-        kpis = calculate_all_kpis(customers_df, orders_df, order_items_df)
-        
+    # Step 1: Load data
+    logger.info("\n--- Step 1: Loading Data into DataFrames ---")
+    processor = DataProcessor()
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(
+            data_processor, 'load_all_data',
+            lambda use_cache=True: tuple(df.copy() for df in source_data)
+        )
+        processor.load_data()
+    print("✅ Data loaded into DataFrames")
+    
+    return processor
+
+
+@pytest.fixture(scope="module")
+def kpis(processor):
+    """All KPIs calculated once from the loaded DataFrames"""
+    # Step 3: Calculate KPIs
+    logger.info("\n--- Step 3: Calculating KPIs ---")
+    return calculate_all_kpis(processor.customers_df, processor.orders_df, processor.order_items_df)
+
+
+@pytest.fixture
+def multi_item_orders():
+    """Small orders/order items frames where one order has several line items"""
+    orders_df = pd.DataFrame({
+        'order_id': ['ORD-1', 'ORD-2', 'ORD-3'],
+        'mobile_number': ['9000000001', '9000000002', '9000000001'],
+        'order_date_time': pd.to_datetime(['2025-01-05 10:00', '2025-01-20 12:30', '2025-02-01 09:15']),
+        'total_amount': [1000.0, 250.0, 400.0]
+    })
+    order_items_df = pd.DataFrame({
+        'order_id': ['ORD-1', 'ORD-1', 'ORD-1', 'ORD-2', 'ORD-3'],
+        'sku_id': ['SKU-A', 'SKU-B', 'SKU-C', 'SKU-A', 'SKU-B'],
+        'sku_count': [1, 2, 1, 3, 1]
+    })
+    return orders_df, order_items_df
+
+
+def test_monthly_trends_multi_item_orders(multi_item_orders):
+    """Test that orders with several line items are counted once in monthly revenue"""
+    orders_df, order_items_df = multi_item_orders
+    trends = calculate_monthly_trends(orders_df, order_items_df).set_index('month')
+    
+    expected_revenue = orders_df.groupby(orders_df['order_date_time'].dt.strftime('%Y-%m'))['total_amount'].sum()
+    assert trends['total_revenue'].to_dict() == expected_revenue.to_dict()
+    assert trends['order_count'].to_dict() == {'2025-02': 1, '2025-01': 2}
+    assert trends['total_items'].to_dict() == {'2025-02': 1, '2025-01': 4}
+    assert trends.loc['2025-01', 'avg_order_value'] == 625.0
+
+
+@pytest.fixture
+def shared_mobile_data():
+    """Two customers registered on the same mobile number, which placed two orders"""
+    customers_df = pd.DataFrame({
+        'customer_id': ['CUST-1', 'CUST-2', 'CUST-3'],
+        'customer_name': ['Asha', 'Ravi', 'Meera'],
+        'mobile_number': ['9000000001', '9000000001', '9000000002'],
+        'region': ['West', 'West', 'South']
+    })
+    orders_df = pd.DataFrame({
+        'order_id': ['ORD-1', 'ORD-2', 'ORD-3'],
+        'mobile_number': ['9000000001', '9000000001', '9000000002'],
+        'order_date_time': pd.to_datetime(['2025-01-05 10:00', '2025-01-20 12:30', '2025-02-01 09:15']),
+        'total_amount': [10.0, 30.0, 50.0]
+    })
+    return customers_df, orders_df
+
+
+def test_customer_kpis_shared_mobile(shared_mobile_data):
+    """Test that orders on a shared mobile number are counted once per customer"""
+    customers_df, orders_df = shared_mobile_data
+    
+    repeat = calculate_repeat_customers(customers_df, orders_df).set_index('customer_id')
+    assert sorted(repeat.index) == ['CUST-1', 'CUST-2']
+    assert repeat['order_count'].to_dict() == {'CUST-1': 2, 'CUST-2': 2}
+    assert repeat['total_spent'].to_dict() == {'CUST-1': 40.0, 'CUST-2': 40.0}
+    
+    top = calculate_top_customers_last_30_days(
+        customers_df, orders_df, cutoff_date=pd.Timestamp('2025-01-01').to_pydatetime()
+    ).set_index('customer_id')
+    assert top['order_count'].to_dict() == {'CUST-1': 2, 'CUST-2': 2, 'CUST-3': 1}
+    assert top['total_spent'].to_dict() == {'CUST-1': 40.0, 'CUST-2': 40.0, 'CUST-3': 50.0}
+    
+    # calculate_all_kpis shares one orders x customers join; it must not be re-joined
+    order_items_df = pd.DataFrame({'order_id': ['ORD-1'], 'sku_id': ['SKU-A'], 'sku_count': [1]})
+    all_kpis = calculate_all_kpis(customers_df, orders_df, order_items_df)
+    pd.testing.assert_frame_equal(
+        all_kpis['repeat_customers'],
+        calculate_repeat_customers(customers_df, orders_df)
+    )
+
+
+def _baseline_customers(customers_df: pd.DataFrame) -> pd.DataFrame:
+    """Customer frame with the original plain object text columns"""
+    return customers_df.astype({col: object for col in customers_df.columns})
+
+
+def _baseline_regional_revenue(customers_df: pd.DataFrame, orders_df: pd.DataFrame) -> pd.DataFrame:
+    """Regional revenue computed the original way (merge, then groupby with nunique)"""
+    customers_df = _baseline_customers(customers_df)
+    merged_df = orders_df.merge(
+        customers_df[['mobile_number', 'customer_id', 'region']],
+        on='mobile_number',
+        how='inner'
+    )
+    return merged_df.groupby('region').agg(
+        customer_count=('customer_id', 'nunique'),
+        order_count=('order_id', 'nunique'),
+        total_revenue=('total_amount', 'sum'),
+        avg_order_value=('total_amount', 'mean'),
+        max_order_value=('total_amount', 'max')
+    ).reset_index().sort_values(by='total_revenue', ascending=False).reset_index(drop=True)
+
+
+def test_regional_revenue_shared_mobile(shared_mobile_data):
+    """Test that regional order counts match the baseline when a mobile is shared"""
+    customers_df, orders_df = shared_mobile_data
+    regional = calculate_regional_revenue(customers_df, orders_df)
+    expected = _baseline_regional_revenue(customers_df, orders_df)
+    
+    assert regional.set_index('region')['order_count'].to_dict() == {'West': 2, 'South': 1}
+    pd.testing.assert_frame_equal(
+        regional.astype({'region': str}),
+        expected.astype({'region': str}),
+        check_dtype=False
+    )
+
+
+def _baseline_customer_stats(customers_df: pd.DataFrame, orders_df: pd.DataFrame) -> pd.DataFrame:
+    """Per-customer order stats computed the original way (merge, then groupby with nunique)"""
+    merged_df = orders_df.astype({'mobile_number': object}).merge(
+        _baseline_customers(customers_df),
+        on='mobile_number',
+        how='inner'
+    )
+    return merged_df.groupby(
+        ['customer_id', 'customer_name', 'mobile_number', 'region']
+    ).agg(
+        order_count=('order_id', 'nunique'),
+        total_spent=('total_amount', 'sum'),
+        last_order_date=('order_date_time', 'max'),
+        first_order_date=('order_date_time', 'min')
+    ).reset_index()
+
+
+def test_customer_kpis_match_baseline(source_data, processor):
+    """Test repeat, regional and top-customer KPIs against the original implementations"""
+    customers_df, orders_df, _ = source_data
+    baseline_stats = _baseline_customer_stats(customers_df, orders_df)
+    
+    repeat = calculate_repeat_customers(processor.customers_df, processor.orders_df)
+    expected_repeat = baseline_stats.loc[
+        baseline_stats['order_count'] > 1,
+        ['customer_id', 'customer_name', 'mobile_number', 'region', 'order_count', 'total_spent']
+    ]
+    pd.testing.assert_frame_equal(
+        repeat.sort_values('customer_id', ignore_index=True),
+        expected_repeat.sort_values('customer_id', ignore_index=True)
+    )
+    
+    regional = calculate_regional_revenue(processor.customers_df, processor.orders_df)
+    pd.testing.assert_frame_equal(
+        regional.sort_values('region', ignore_index=True),
+        _baseline_regional_revenue(customers_df, orders_df).sort_values('region', ignore_index=True)
+    )
+    
+    # A cutoff inside the data's date range (the default window may hold no orders)
+    cutoff_date = TIMEZONE.localize(datetime(2025, 10, 1))
+    top = calculate_top_customers_last_30_days(
+        processor.customers_df, processor.orders_df, top_n=len(customers_df), cutoff_date=cutoff_date
+    )
+    expected_top = _baseline_customer_stats(
+        customers_df, orders_df[orders_df['order_date_time'] >= cutoff_date]
+    )
+    # The processor stores order times as naive IST wall-clock values
+    for col in ['last_order_date', 'first_order_date']:
+        expected_top[col] = expected_top[col].dt.tz_convert(TIMEZONE).dt.tz_localize(None)
+    assert not top.empty
+    pd.testing.assert_frame_equal(
+        top.sort_values('customer_id', ignore_index=True),
+        expected_top.sort_values('customer_id', ignore_index=True)
+    )
+
+
+def test_data_summary(processor):
+    """Test the summary of the loaded data"""
+    # Step 2: Display data summary
+    logger.info("\n--- Step 2: Data Summary ---")
+    summary = processor.get_data_summary()
+    print("\nData Summary:")
+    print(f"  Customers: {summary['customers']['count']} records")
+    print(f"  Regions: {summary['customers']['regions']}")
+    print(f"  Orders: {summary['orders']['count']} records")
+    print(f"  Date Range: {summary['orders']['date_range']}")
+    print(f"  Total Revenue: ₹{summary['orders']['total_revenue']:,.2f}")
+    print(f"  Order Items: {summary['order_items']['count']} line items")
+    print(f"  Unique SKUs: {summary['order_items']['unique_skus']}")
+    
+    assert summary['customers']['count'] > 0
+    assert summary['orders']['count'] > 0
+    assert summary['order_items']['count'] > 0
+
+
+def test_kpi_results(kpis):
+    """Test that every KPI is calculated"""
+    assert set(KPI_KEYS) <= set(kpis)
+    
+    # Display KPI results, streamed to stdout as tab-separated rows
+    # (skipped when the log level hides INFO output)
+    if logger.isEnabledFor(logging.INFO):
         print("\n" + "=" * 70)
         print("KPI RESULTS")
         print("=" * 70)
@@ -56,47 +260,71 @@ def test_in_memory_approach():
         print("\n📊 KPI 1: REPEAT CUSTOMERS")
         print("-" * 70)
         if not kpis['repeat_customers'].empty:
-            print(kpis['repeat_customers'].to_string(index=False))
+            kpis['repeat_customers'].to_csv(sys.stdout, sep='\t', index=False)
         else:
             print("No repeat customers found")
         
         # KPI 2: Monthly Order Trends
         print("\n📊 KPI 2: MONTHLY ORDER TRENDS")
         print("-" * 70)
-        print(kpis['monthly_trends'].to_string(index=False))
+        kpis['monthly_trends'].to_csv(sys.stdout, sep='\t', index=False)
         
         # KPI 3: Regional Revenue
         print("\n📊 KPI 3: REGIONAL REVENUE")
         print("-" * 70)
-        print(kpis['regional_revenue'].to_string(index=False))
+        kpis['regional_revenue'].to_csv(sys.stdout, sep='\t', index=False)
         
         # KPI 4: Top Customers (Last 30 Days)
         print("\n📊 KPI 4: TOP CUSTOMERS (LAST 30 DAYS)")
         print("-" * 70)
         if not kpis['top_customers_last_30_days'].empty:
-            print(kpis['top_customers_last_30_days'].to_string(index=False))
+            kpis['top_customers_last_30_days'].to_csv(sys.stdout, sep='\t', index=False)
         else:
             print("No customers found in last 30 days")
-        
-        # Step 4: Export results
-        logger.info("\n--- Step 4: Exporting Results ---")
-        output_file = RESULTS_DIR / "in_memory_kpis.xlsx"
-        export_kpis_to_excel(kpis, str(output_file))
-        print(f"✅ Results exported to: {output_file}")
-        
-        print("\n" + "=" * 70)
-        logger.info("IN-MEMORY APPROACH TEST COMPLETED SUCCESSFULLY!")
-        print("=" * 70)
-        
-        return True
-        
-    except Exception as e:
-        logger.error(f"Test failed with error: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        return False
+
+
+def test_kpi_amount_precision(processor, kpis):
+    """Test that amounts and KPI aggregates keep full float64 precision"""
+    assert processor.orders_df['total_amount'].dtype == 'float64'
+    
+    for name, column in [
+        ('repeat_customers', 'total_spent'),
+        ('monthly_trends', 'total_revenue'),
+        ('monthly_trends', 'avg_order_value'),
+        ('regional_revenue', 'total_revenue'),
+        ('regional_revenue', 'avg_order_value'),
+        ('top_customers_last_30_days', 'total_spent'),
+    ]:
+        assert kpis[name][column].dtype == 'float64', f"{name}.{column}"
+    
+    # Every order lands in exactly one month, so the monthly totals add up to the grand total
+    assert kpis['monthly_trends']['total_revenue'].sum() == pytest.approx(
+        processor.orders_df['total_amount'].sum()
+    )
+
+
+def test_kpi_text_columns_are_object(kpis):
+    """Test that KPI text columns keep the plain object dtype of the original results"""
+    for name in KPI_KEYS:
+        for column in ['customer_id', 'customer_name', 'mobile_number', 'region', 'month']:
+            if column in kpis[name].columns:
+                assert kpis[name][column].dtype == object, f"{name}.{column}"
+
+
+def test_export_results(kpis, tmp_path):
+    """Test exporting the KPIs to Excel"""
+    # Step 4: Export results (to a temporary directory, leaving results/ untouched)
+    logger.info("\n--- Step 4: Exporting Results ---")
+    output_file = tmp_path / "in_memory_kpis.xlsx"
+    export_kpis_to_excel(kpis, str(output_file))
+    print(f"✅ Results exported to: {output_file}")
+    
+    assert output_file.exists()
+    
+    print("\n" + "=" * 70)
+    logger.info("IN-MEMORY APPROACH TEST COMPLETED SUCCESSFULLY!")
+    print("=" * 70)
 
 
 if __name__ == "__main__":
-    success = test_in_memory_approach()
-    sys.exit(0 if success else 1)
+    sys.exit(pytest.main([__file__, "-s"]))